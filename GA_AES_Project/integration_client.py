@@ -7,13 +7,20 @@ Sends GA-AES encrypted messages to server
 import socket
 import time
 import sys
-from aes_custom import CustomAES
-from network_bridge import network_bridge
+import logging
+import array
+from time import perf_counter_ns
+from aes_custom import CustomAES, AES_NI_AVAILABLE
+from network_bridge import (network_bridge, send_frame, FrameReader, configure_console_logging,
+                            encode_records, decode_records, FRAME_BATCH, BATCH_NONCE_SIZE)
 from Crypto.Random import get_random_bytes
 
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
 class IntegrationClient:
     def __init__(self, server_host='127.0.0.1', server_port=5000,
-                 client_name="Client1", use_ga_optimization=True):
+                 client_name="Client1", use_ga_optimization=True, verbose=False):
         """
         Integration Client with Packet Tracer bridge
         
@@ -22,11 +29,13 @@ class IntegrationClient:
             server_port: Server port
             client_name: Name of this client
             use_ga_optimization: Use GA-optimized or standard AES
+            verbose: Log per-message details (kept off the hot path by default)
         """
         self.server_host = server_host
         self.server_port = server_port
         self.client_name = client_name
         self.use_ga_optimization = use_ga_optimization
+        configure_console_logging(logger, verbose)
         
         # Initialize AES (same params as server)
         if use_ga_optimization:
@@ -39,33 +48,65 @@ class IntegrationClient:
             self.aes_params = None
             self.client_type = "STANDARD"
         
-        self.aes = CustomAES(self.aes_params)
+        self.aes = CustomAES(self.aes_params, record_times=True)
         # Use a fixed key that matches the server
         self.key = b'\x00\x01\x02\x03\x04\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f'
         
-        self.latencies = []
+        # Build the cipher context once; every message reuses it
+        self.aes.prepare(self.key)
+        
+        self._sock = None  # Persistent connection, opened on first send
+        self._reader = None
+        
+        self.latencies = array.array('q')  # Round-trip latencies in nanoseconds
         self.messages_sent = 0
     
+    def connect(self):
+        """Open the persistent server connection (no-op if already open)"""
+        if self._sock is None:
+            sock = socket.create_connection((self.server_host, self.server_port))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock = sock
+            self._reader = FrameReader(sock)
+    
+    def close(self):
+        """Close the server connection"""
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            self._reader = None
+    
     def send_message(self, message: str, retry_count=3) -> float:
         """
         Send encrypted message to server through Packet Tracer network
+        Messages share one connection, framed with a length prefix
         
         Returns:
             Latency in milliseconds
         """
         for attempt in range(retry_count):
-            client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            
             try:
-                start_time = time.perf_counter()
+                start_ns = perf_counter_ns()
                 
-                # Connect to server
-                client_socket.connect((self.server_host, self.server_port))
+                # Connect to server (first message only)
+                self.connect()
                 
                 # Encrypt message
                 encrypted = self.aes.encrypt(message.encode(), self.key)
                 
-                # Record packet in network bridge (simulating Packet Tracer)
+                # Send to server
+                send_frame(self._sock, encrypted)
+                
+                # Receive ACK
+                frame = self._reader.read_frame()
+                if frame is None:
+                    raise ConnectionError("server closed the connection")
+                
+                latency_ns = perf_counter_ns() - start_ns
+                latency = latency_ns / 1e6  # ms
+                
+                # Record packet in network bridge (simulating Packet Tracer),
+                # outside the measured latency window
                 sent_packet = network_bridge.send_packet(
                     source_ip="127.0.0.1",
                     dest_ip=self.server_host,
@@ -73,25 +114,18 @@ class IntegrationClient:
                     encryption_type="GA-AES" if self.use_ga_optimization else "Standard-AES"
                 )
                 
-                # Send to server
-                client_socket.send(encrypted)
-                
-                # Receive ACK
-                response = client_socket.recv(4096)
-                
-                end_time = time.perf_counter()
-                latency = (end_time - start_time) * 1000  # ms
-                
-                self.latencies.append(latency)
+                self.latencies.append(latency_ns)
                 self.messages_sent += 1
                 
                 encryption_time = self.aes.encryption_times[-1] if self.aes.encryption_times else 0
                 
-                print(f"\n✅ {self.client_name} sent message")
-                print(f"   📨 Encrypted size: {len(encrypted)} bytes")
-                print(f"   🔒 Encryption time: {encryption_time:.4f} ms")
-                print(f"   ⏱️  Total latency: {latency:.2f} ms")
-                print(f"   🌐 Network simulation: {sent_packet.latency_ms:.2f} ms")
+                logger.debug("\n✅ %s sent message\n"
+                             "   📨 Encrypted size: %d bytes\n"
+                             "   🔒 Encryption time: %.4f ms\n"
+                             "   ⏱️  Total latency: %.2f ms\n"
+                             "   🌐 Network simulation: %.2f ms",
+                             self.client_name, len(encrypted), encryption_time,
+                             latency, sent_packet.latency_ms)
                 
                 return latency
                 
@@ -104,21 +138,80 @@ class IntegrationClient:
                     return None
             except Exception as e:
                 print(f"❌ {self.client_name} - Error: {e}")
+                self.close()
                 return None
-            finally:
-                client_socket.close()
+    
+    def send_pipelined(self, messages) -> float:
+        """
+        Send all messages as one batch frame: the length-prefixed messages
+        are encrypted as a single CTR stream (one cipher call, no padding),
+        and the server answers with one batch frame of ACKs
+        
+        Returns:
+            Average latency per message in milliseconds (0.0 for no messages)
+        """
+        if not messages:
+            return 0.0
+        
+        start_ns = perf_counter_ns()
+        
+        self.connect()
+        nonce = get_random_bytes(BATCH_NONCE_SIZE)
+        cipher = self.aes.new_ctr_cipher(self.key, nonce)
+        payload = nonce + cipher.encrypt(encode_records([message.encode() for message in messages]))
+        send_frame(self._sock, payload, FRAME_BATCH)
+        
+        frame = self._reader.read_frame()
+        if frame is None:
+            raise ConnectionError("server closed the connection")
+        ack = frame[1]
+        acks = decode_records(self.aes.new_ctr_cipher(self.key, bytes(ack[:BATCH_NONCE_SIZE]))
+                              .decrypt(ack[BATCH_NONCE_SIZE:]))
+        if len(acks) != len(messages):
+            raise ConnectionError(f"server acknowledged {len(acks)} of {len(messages)} messages")
+        
+        latency_ns = (perf_counter_ns() - start_ns) // len(messages)  # per message
+        latency = latency_ns / 1e6  # ms
+        
+        # Record packet in network bridge (simulating Packet Tracer)
+        network_bridge.send_packet(
+            source_ip="127.0.0.1",
+            dest_ip=self.server_host,
+            payload=payload,
+            encryption_type="GA-AES" if self.use_ga_optimization else "Standard-AES"
+        )
+        
+        self.latencies.extend([latency_ns] * len(messages))
+        self.messages_sent += len(messages)
+        
+        logger.debug("\n✅ %s sent %d pipelined messages\n"
+                     "   ⏱️  Avg latency per message: %.2f ms",
+                     self.client_name, len(messages), latency)
+        
+        return latency
     
     def send_batch(self, num_messages=10, delay=0.5):
-        """Send multiple messages"""
+        """Send multiple messages (pipelined in one write when delay is 0)"""
         print(f"\n{'='*70}")
         print(f"🚀 {self.client_name} - BATCH TEST [{self.client_type} AES]")
+        print(f"⚡ AES-NI Backend: {'YES' if AES_NI_AVAILABLE else 'NO'}")
         print(f"{'='*70}")
         
-        for i in range(num_messages):
-            message = f"{self.client_name} - Test Message {i+1} for encryption testing"
-            self.send_message(message)
-            if i < num_messages - 1:
-                time.sleep(delay)
+        messages = [f"{self.client_name} - Test Message {i+1} for encryption testing"
+                    for i in range(num_messages)]
+        
+        try:
+            if delay <= 0:
+                self.send_pipelined(messages)
+            else:
+                for i, message in enumerate(messages):
+                    self.send_message(message)
+                    if i < num_messages - 1:
+                        time.sleep(delay)
+        except Exception as e:
+            print(f"❌ {self.client_name} - Error: {e}")
+        finally:
+            self.close()
         
         # Print client statistics
         self.print_statistics()
@@ -126,9 +219,10 @@ class IntegrationClient:
     def print_statistics(self):
         """Print client statistics"""
         if self.latencies:
-            avg_latency = sum(self.latencies) / len(self.latencies)
-            min_latency = min(self.latencies)
-            max_latency = max(self.latencies)
+            # Convert nanoseconds to ms only for display
+            avg_latency = sum(self.latencies) / len(self.latencies) / 1e6
+            min_latency = min(self.latencies) / 1e6
+            max_latency = max(self.latencies) / 1e6
             
             print(f"\n{'='*70}")
             print(f"📊 {self.client_name} STATISTICS - [{self.client_type} AES]")
@@ -149,7 +243,8 @@ if __name__ == "__main__":
         server_host='127.0.0.1',
         server_port=5000,
         client_name=client_name,
-        use_ga_optimization=use_ga
+        use_ga_optimization=use_ga,
+        verbose="--quiet" not in sys.argv
     )
     
     # Send batch of messages
@@ -5,15 +5,22 @@ Uses GA-optimized AES encryption
 """
 
 import socket
+import asyncio
 import json
 import time
-from aes_custom import CustomAES  # Your existing AES module
-from network_bridge import network_bridge, NetworkPacket
+import logging
+from aes_custom import CustomAES, AES_NI_AVAILABLE  # Your existing AES module
+from network_bridge import (network_bridge, NetworkPacket, encode_frame, configure_console_logging,
+                            encode_records, decode_records, check_frame_header, FRAME_HEADER,
+                            FRAME_MESSAGE, FRAME_BATCH, BATCH_NONCE_SIZE)
 from Crypto.Random import get_random_bytes
 
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
 class IntegrationServer:
     def __init__(self, host='127.0.0.1', port=5000, 
-                 use_ga_optimization=True):
+                 use_ga_optimization=True, verbose=False, trace=False):
         """
         Integration Server with Packet Tracer bridge
         
@@ -21,10 +28,14 @@ class IntegrationServer:
             host: Server IP
             port: Server port
             use_ga_optimization: Use GA-optimized or standard AES
+            verbose: Log per-connection/per-message details
+            trace: Print a packet trace for every received message
         """
         self.host = host
         self.port = port
         self.use_ga_optimization = use_ga_optimization
+        self.trace = trace
+        configure_console_logging(logger, verbose)
         
         # Initialize AES
         if use_ga_optimization:
@@ -37,96 +48,178 @@ class IntegrationServer:
             self.aes_params = None
             self.server_type = "STANDARD"
         
-        self.aes = CustomAES(self.aes_params)
+        self.aes = CustomAES(self.aes_params, record_times=True)
         # Use the same fixed key as the client
         self.key = b'\x00\x01\x02\x03\x04\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f'
         
+        # Build the cipher context once; every message reuses it
+        self.aes.prepare(self.key)
+        
         self.connection_count = 0
         self.total_bytes_received = 0
     
     def start(self):
         """Start the server"""
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print(f"\n⛔ Server stopped by user\n")
+        except Exception as e:
+            print(f"❌ Server error: {e}\n")
+        finally:
+            self.print_statistics()
+    
+    async def serve(self):
+        """Accept clients concurrently; each connection runs in its own task"""
+        server = await asyncio.start_server(self.handle_client, self.host, self.port,
+                                            reuse_address=True)
+        
+        print(f"\n{'='*70}")
+        print(f"🔐 INTEGRATION SERVER - [{self.server_type} AES]")
+        print(f"{'='*70}")
+        print(f"📡 Server listening on {self.host}:{self.port}")
+        print(f"🌐 Connected to Packet Tracer Bridge: YES")
+        print(f"🧬 GA Optimization: {self.use_ga_optimization}")
+        print(f"⚡ AES-NI Backend: {'YES' if AES_NI_AVAILABLE else 'NO'}")
+        print(f"{'='*70}\n")
+        
+        async with server:
+            await server.serve_forever()
+    
+    async def handle_client(self, reader, writer):
+        """Handle length-prefixed messages on one connection until the client closes"""
+        self.connection_count += 1
+        client_ip, client_port = writer.get_extra_info('peername')[:2]
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        
+        logger.debug("\n✅ Connection #%d\n   Client IP: %s:%d",
+                     self.connection_count, client_ip, client_port)
+        
+        handlers = {FRAME_MESSAGE: self.handle_message, FRAME_BATCH: self.handle_batch}
         
         try:
-            server_socket.bind((self.host, self.port))
-            server_socket.listen(5)
-            
-            print(f"\n{'='*70}")
-            print(f"🔐 INTEGRATION SERVER - [{self.server_type} AES]")
-            print(f"{'='*70}")
-            print(f"📡 Server listening on {self.host}:{self.port}")
-            print(f"🌐 Connected to Packet Tracer Bridge: YES")
-            print(f"🧬 GA Optimization: {self.use_ga_optimization}")
-            print(f"{'='*70}\n")
-            
             while True:
                 try:
-                    client_socket, address = server_socket.accept()
-                    self.connection_count += 1
-                    client_ip = address[0]
-                    
-                    print(f"\n✅ Connection #{self.connection_count}")
-                    print(f"   Client IP: {client_ip}:{address[1]}")
-                    
-                    # Receive encrypted data
-                    encrypted_data = client_socket.recv(4096)
-                    
-                    if encrypted_data:
-                        # Record packet in network bridge
-                        sent_packet = network_bridge.send_packet(
-                            source_ip=client_ip,
-                            dest_ip=self.host,
-                            payload=encrypted_data,
-                            encryption_type="GA-AES" if self.use_ga_optimization else "Standard-AES"
-                        )
-                        
-                        network_bridge.print_packet_trace(sent_packet)
-                        
-                        # Decrypt message
-                        try:
-                            decrypted = self.aes.decrypt(encrypted_data, self.key)
-                            message_text = decrypted.decode()
-                            
-                            print(f"   🔓 Decrypted: {message_text}")
-                            print(f"   ⏱️  Decryption time: {self.aes.decryption_times[-1]:.4f} ms")
-                            
-                            self.total_bytes_received += len(encrypted_data)
-                            
-                            # Send acknowledgment
-                            ack_msg = f"✓ Received: {message_text}"
-                            encrypted_ack = self.aes.encrypt(ack_msg.encode(), self.key)
-                            
-                            # Record ACK packet
-                            ack_packet = network_bridge.send_packet(
-                                source_ip=self.host,
-                                dest_ip=client_ip,
-                                payload=encrypted_ack,
-                                encryption_type="GA-AES" if self.use_ga_optimization else "Standard-AES"
-                            )
-                            
-                            client_socket.send(encrypted_ack)
-                            print(f"   ✉️  ACK sent back to client\n")
-                            
-                        except Exception as e:
-                            print(f"   ❌ Decryption error: {e}\n")
-                    
-                    client_socket.close()
-                    
-                except KeyboardInterrupt:
-                    print(f"\n⛔ Server stopped by user\n")
+                    kind, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                except asyncio.IncompleteReadError:
+                    break
+                
+                # Reject unknown kinds and oversized lengths before buffering the payload
+                try:
+                    check_frame_header(kind, length)
+                except ValueError as e:
+                    print(f"⚠️  Rejected frame from {client_ip}:{client_port} "
+                          f"(kind={kind}, length={length}): {e}\n")
                     break
-                except Exception as e:
-                    print(f"⚠️  Error: {e}\n")
-                    continue
+                
+                try:
+                    encrypted_data = await reader.readexactly(length)
+                except asyncio.IncompleteReadError:
+                    break
+                
+                if not handlers[kind](writer, client_ip, encrypted_data):
+                    break
+                await writer.drain()
+        except Exception as e:
+            print(f"⚠️  Error: {e}\n")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+    
+    def handle_message(self, writer, client_ip, encrypted_data):
+        """
+        Decrypt one message and write back an encrypted ACK frame
+        
+        Returns:
+            True if the ACK was written, False on decryption error
+        """
+        # Record packet in network bridge
+        sent_packet = network_bridge.send_packet(
+            source_ip=client_ip,
+            dest_ip=self.host,
+            payload=encrypted_data,
+            encryption_type="GA-AES" if self.use_ga_optimization else "Standard-AES"
+        )
         
+        if self.trace:
+            network_bridge.print_packet_trace(sent_packet)
+        
+        # Decrypt message
+        try:
+            decrypted = self.aes.decrypt(encrypted_data, self.key)
+            message_text = decrypted.decode()
         except Exception as e:
-            print(f"❌ Server error: {e}\n")
+            print(f"   ❌ Decryption error: {e}\n")
+            return False
         
-        finally:
-            server_socket.close()
-            self.print_statistics()
+        logger.debug("   🔓 Decrypted: %s\n   ⏱️  Decryption time: %.4f ms",
+                     message_text, self.aes.decryption_times[-1])
+        
+        self.total_bytes_received += len(encrypted_data)
+        
+        # Send acknowledgment
+        ack_msg = f"✓ Received: {message_text}"
+        encrypted_ack = self.aes.encrypt(ack_msg.encode(), self.key)
+        writer.write(encode_frame(encrypted_ack))
+        
+        # Record ACK packet once it is on its way
+        ack_packet = network_bridge.send_packet(
+            source_ip=self.host,
+            dest_ip=client_ip,
+            payload=encrypted_ack,
+            encryption_type="GA-AES" if self.use_ga_optimization else "Standard-AES"
+        )
+        logger.debug("   ✉️  ACK sent back to client\n")
+        return True
+    
+    def handle_batch(self, writer, client_ip, payload):
+        """
+        Decrypt a batch frame (CTR nonce + encrypted records) with one
+        cipher call and answer with a single batch frame of ACKs
+        
+        Returns:
+            True if the ACKs were written, False on decryption error
+        """
+        encryption_type = "GA-AES" if self.use_ga_optimization else "Standard-AES"
+        
+        # Record packet in network bridge
+        network_bridge.send_packet(
+            source_ip=client_ip,
+            dest_ip=self.host,
+            payload=payload,
+            encryption_type=encryption_type
+        )
+        
+        # Decrypt all messages
+        try:
+            cipher = self.aes.new_ctr_cipher(self.key, bytes(payload[:BATCH_NONCE_SIZE]))
+            messages = [m.decode() for m in decode_records(cipher.decrypt(payload[BATCH_NONCE_SIZE:]))]
+        except Exception as e:
+            print(f"   ❌ Decryption error: {e}\n")
+            return False
+        
+        logger.debug("   🔓 Decrypted batch of %d messages", len(messages))
+        
+        self.total_bytes_received += len(payload)
+        
+        # Send acknowledgments
+        nonce = get_random_bytes(BATCH_NONCE_SIZE)
+        acks = encode_records([f"✓ Received: {m}".encode() for m in messages])
+        encrypted_acks = nonce + self.aes.new_ctr_cipher(self.key, nonce).encrypt(acks)
+        writer.write(encode_frame(encrypted_acks, FRAME_BATCH))
+        
+        # Record ACK packet once it is on its way
+        network_bridge.send_packet(
+            source_ip=self.host,
+            dest_ip=client_ip,
+            payload=encrypted_acks,
+            encryption_type=encryption_type
+        )
+        logger.debug("   ✉️  Batch ACK sent back to client\n")
+        return True
     
     def print_statistics(self):
         """Print server statistics"""
@@ -152,6 +245,8 @@ if __name__ == "__main__":
     server = IntegrationServer(
         host='127.0.0.1',
         port=5000,
-        use_ga_optimization=use_ga
+        use_ga_optimization=use_ga,
+        verbose="--quiet" not in sys.argv,
+        trace="--trace" in sys.argv
     )
     server.start()
\ No newline at end of file
@@ -46,6 +46,10 @@ class ProjectPipeline:
                 'elitism_count': 2
             }
         
+        # Evaluate each generation's avalanche/entropy on all cores unless told
+        # otherwise (encryption speed is still timed serially in this process)
+        ga_params = {'n_workers': os.cpu_count() or 1, **ga_params}
+        
         # PHASE 1: Run Genetic Algorithm
         print("PHASE 1: GENETIC ALGORITHM OPTIMIZATION")
         print("-"*70)
@@ -4,39 +4,205 @@ Simulates network latency and packet flow tracking
 """
 
 import socket
+import struct
+import sys
+import logging
 import json
 import time
 from datetime import datetime
 import threading
+from collections import deque
+import numpy as np
 from dataclasses import dataclass
 from typing import Dict, List
 
+def configure_console_logging(logger: logging.Logger, verbose: bool):
+    """Show logger's per-message debug output on stdout only when verbose"""
+    logger.setLevel(logging.DEBUG if verbose else logging.WARNING)
+    if verbose and not any(type(h) is logging.StreamHandler for h in logger.handlers):
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+
+
+# Frame header for several messages on one TCP stream: kind byte + 4-byte length
+FRAME_HEADER = struct.Struct('>BI')
+FRAME_MESSAGE = 0  # One ECB/PKCS#7 encrypted message
+FRAME_BATCH = 1    # CTR nonce + length-prefixed records encrypted as one stream
+BATCH_NONCE_SIZE = 8
+FRAME_KINDS = (FRAME_MESSAGE, FRAME_BATCH)
+
+# Largest frame payload either side will buffer; bigger lengths are rejected
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+# Length prefix of records inside a batch
+RECORD_HEADER = struct.Struct('>I')
+
+
+def encode_records(records) -> bytes:
+    """Join records into one buffer, each with a 4-byte big-endian length prefix"""
+    return b''.join(RECORD_HEADER.pack(len(r)) + r for r in records)
+
+
+def decode_records(data) -> List[bytes]:
+    """Split a buffer built by encode_records back into records"""
+    records = []
+    offset = 0
+    header_size = RECORD_HEADER.size
+    while offset < len(data):
+        if offset + header_size > len(data):
+            raise ValueError("truncated record header")
+        (length,) = RECORD_HEADER.unpack_from(data, offset)
+        offset += header_size
+        if offset + length > len(data):
+            raise ValueError("truncated record")
+        records.append(bytes(data[offset:offset + length]))
+        offset += length
+    return records
+
+
+def check_frame_header(kind: int, length: int):
+    """Raise ValueError for an unknown frame kind or a length over MAX_FRAME_SIZE"""
+    if kind not in FRAME_KINDS:
+        raise ValueError(f"unknown frame kind {kind}")
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"frame of {length} bytes exceeds MAX_FRAME_SIZE ({MAX_FRAME_SIZE})")
+
+
+def encode_frame(payload: bytes, kind: int = FRAME_MESSAGE) -> bytes:
+    """Prefix payload with its frame header"""
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+def send_frame(sock: socket.socket, payload: bytes, kind: int = FRAME_MESSAGE):
+    """Send payload with its frame header"""
+    sock.sendall(encode_frame(payload, kind))
+
+
+class FrameReader:
+    """
+    Buffered reader for length-prefixed frames
+    Receives into one preallocated buffer, so several pipelined
+    frames are drained per recv_into() call. Payloads are returned as
+    memoryview slices of that buffer (no copy), valid until the next read.
+    """
+    
+    def __init__(self, sock: socket.socket, buffer: bytearray = None, buffer_size: int = 65536):
+        self.sock = sock
+        self._buf = buffer if buffer is not None else bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._start = 0  # First unread byte
+        self._end = 0    # End of received data
+    
+    def _fill(self, needed: int) -> bool:
+        """Receive until at least 'needed' unread bytes are buffered; False on EOF"""
+        if self._start + needed > len(self._buf):
+            # Move unread bytes to the front, growing the buffer for oversized frames
+            unread = self._end - self._start
+            if needed > len(self._buf):
+                buf = bytearray(needed)
+                buf[:unread] = self._view[self._start:self._end]
+                self._buf, self._view = buf, memoryview(buf)
+            else:
+                self._buf[:unread] = self._buf[self._start:self._end]
+            self._start, self._end = 0, unread
+        
+        while self._end - self._start < needed:
+            n = self.sock.recv_into(self._view[self._end:])
+            if n == 0:
+                return False
+            self._end += n
+        return True
+    
+    def read_frame(self):
+        """
+        Return the next (kind, payload) frame, or None once the peer closes
+        Raises ValueError for a header check_frame_header rejects
+        """
+        header_size = FRAME_HEADER.size
+        if not self._fill(header_size):
+            return None
+        kind, length = FRAME_HEADER.unpack_from(self._buf, self._start)
+        check_frame_header(kind, length)
+        if not self._fill(header_size + length):
+            return None
+        
+        start = self._start + header_size
+        self._start = start + length
+        if self._start == self._end:
+            self._start = self._end = 0
+        return kind, self._view[start:start + length]
+    
+    def __iter__(self):
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                return
+            yield frame
+
+
 @dataclass
 class NetworkPacket:
     """Represents a network packet"""
+    __slots__ = ('source_ip', 'dest_ip', 'payload', 'timestamp_ns', 'latency_ms', 'size_bytes')
     source_ip: str
     dest_ip: str
     payload: bytes
-    timestamp: float
+    timestamp_ns: int  # time.monotonic_ns()
+    latency_ms: float
+    size_bytes: int
+
+@dataclass
+class PacketHeader:
+    """Packet record kept in the bridge history (no payload)"""
+    __slots__ = ('source_ip', 'dest_ip', 'timestamp_ns', 'latency_ms', 'size_bytes')
+    source_ip: str
+    dest_ip: str
+    timestamp_ns: int  # time.monotonic_ns()
     latency_ms: float
     size_bytes: int
 
+# Offset converting time.monotonic_ns() stamps to wall-clock time for display
+MONOTONIC_TO_WALL_NS = time.time_ns() - time.monotonic_ns()
+
+# Simulated latency model (ms), measured in Packet Tracer
+BASE_LATENCY_MS = 2.0
+SIZE_LATENCY_MS_PER_BYTE = 0.5 / 1000  # 0.5ms per KB
+ENCRYPTION_OVERHEAD_MS = 0.42
+
+# Slots of PacketTracerBridge._stats
+STAT_NAMES = ('total_packets', 'total_bytes', 'total_latency',
+              'encryption_overhead', 'network_latency')
+TOTAL_PACKETS, TOTAL_BYTES, TOTAL_LATENCY, ENCRYPTION_OVERHEAD, NETWORK_LATENCY = range(len(STAT_NAMES))
+
 class PacketTracerBridge:
     """
     Bridge between Python encryption and Packet Tracer network simulation
     """
     
+    # Number of recent packets kept for tracing
+    TRACE_SIZE = 1024
+    
+    # Number of recent packet latencies kept for percentiles
+    LATENCY_WINDOW = 65536
+    
     def __init__(self, simulation_enabled=True):
         self.simulation_enabled = simulation_enabled
-        self.packets_sent = []
-        self.packets_received = []
-        self.statistics = {
-            'total_packets': 0,
-            'total_bytes': 0,
-            'total_latency': 0,
-            'encryption_overhead': 0,
-            'network_latency': 0
-        }
+        # Recent packets as PacketHeaders; payloads are not kept so ciphertexts can be freed
+        self.packets_sent = deque(maxlen=self.TRACE_SIZE)
+        self.packets_received = deque(maxlen=self.TRACE_SIZE)
+        # Running counters, indexed by the TOTAL_* / *_LATENCY / ENCRYPTION_OVERHEAD constants
+        self._stats = [0] * len(STAT_NAMES)
+        
+        # Recent per-packet latencies: preallocated float32 ring buffer plus write
+        # cursor, so a long-running bridge keeps a fixed-size window for percentiles
+        self._latencies = np.zeros(self.LATENCY_WINDOW, dtype=np.float32)
+        self._latency_cursor = 0  # Total latencies written; slot is cursor % window
+    
+    @property
+    def statistics(self) -> Dict:
+        """Running counters as a dict"""
+        return dict(zip(STAT_NAMES, self._stats))
         
     def simulate_network_latency(self, packet_size_bytes: int, 
                                  is_encrypted: bool = True) -> float:
@@ -51,20 +217,15 @@ class PacketTracerBridge:
         Returns:
             Simulated latency in milliseconds
         """
+        stats = self._stats
         
-        # Base network latency (from Packet Tracer simulation)
-        base_latency = 2.0  # ms (you can measure this in Packet Tracer)
+        # Base latency, growing with packet size; encryption adds overhead
+        total_latency = BASE_LATENCY_MS + packet_size_bytes * SIZE_LATENCY_MS_PER_BYTE
+        stats[NETWORK_LATENCY] += BASE_LATENCY_MS
         
-        # Latency increases with packet size (network effect)
-        size_latency = (packet_size_bytes / 1000) * 0.5  # 0.5ms per KB
-        
-        # Encryption adds overhead
-        encryption_overhead = 0.42 if is_encrypted else 0  # ms
-        
-        total_latency = base_latency + size_latency + encryption_overhead
-        
-        self.statistics['network_latency'] += base_latency
-        self.statistics['encryption_overhead'] += encryption_overhead
+        if is_encrypted:
+            total_latency += ENCRYPTION_OVERHEAD_MS
+            stats[ENCRYPTION_OVERHEAD] += ENCRYPTION_OVERHEAD_MS
         
         return total_latency
     
@@ -83,7 +244,7 @@ class PacketTracerBridge:
             NetworkPacket object with latency data
         """
         
-        timestamp = time.time()
+        timestamp_ns = time.monotonic_ns()
         packet_size = len(payload)
         
         # Simulate network latency
@@ -95,15 +256,18 @@ class PacketTracerBridge:
             source_ip=source_ip,
             dest_ip=dest_ip,
             payload=payload,
-            timestamp=timestamp,
+            timestamp_ns=timestamp_ns,
             latency_ms=latency,
             size_bytes=packet_size
         )
         
-        self.packets_sent.append(packet)
-        self.statistics['total_packets'] += 1
-        self.statistics['total_bytes'] += packet_size
-        self.statistics['total_latency'] += latency
+        self.packets_sent.append(PacketHeader(source_ip, dest_ip, timestamp_ns, latency, packet_size))
+        stats = self._stats
+        stats[TOTAL_PACKETS] += 1
+        stats[TOTAL_BYTES] += packet_size
+        stats[TOTAL_LATENCY] += latency
+        self._latencies[self._latency_cursor % self.LATENCY_WINDOW] = latency
+        self._latency_cursor += 1
         
         return packet
     
@@ -111,24 +275,36 @@ class PacketTracerBridge:
         """
         Receive a packet through simulated network
         """
-        self.packets_received.append(packet)
+        self.packets_received.append(PacketHeader(packet.source_ip, packet.dest_ip, packet.timestamp_ns,
+                                                  packet.latency_ms, packet.size_bytes))
         return packet
     
     def get_statistics(self) -> Dict:
         """Get network statistics"""
-        if self.statistics['total_packets'] > 0:
-            avg_latency = (self.statistics['total_latency'] / 
-                          self.statistics['total_packets'])
+        stats = self.statistics
+        if stats['total_packets'] > 0:
+            avg_latency = (stats['total_latency'] / 
+                          stats['total_packets'])
         else:
             avg_latency = 0
         
+        # Percentiles cover the last LATENCY_WINDOW packets
+        if self._latency_cursor:
+            latencies = self._latencies[:min(self._latency_cursor, self.LATENCY_WINDOW)]
+            p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9])
+        else:
+            p50 = p99 = p999 = 0
+        
         return {
-            'total_packets': self.statistics['total_packets'],
-            'total_bytes': self.statistics['total_bytes'],
+            'total_packets': stats['total_packets'],
+            'total_bytes': stats['total_bytes'],
             'average_latency_ms': round(avg_latency, 4),
-            'total_latency_ms': round(self.statistics['total_latency'], 2),
-            'encryption_overhead_ms': round(self.statistics['encryption_overhead'], 4),
-            'network_latency_ms': round(self.statistics['network_latency'], 2)
+            'total_latency_ms': round(stats['total_latency'], 2),
+            'encryption_overhead_ms': round(stats['encryption_overhead'], 4),
+            'network_latency_ms': round(stats['network_latency'], 2),
+            'p50_latency_ms': round(float(p50), 4),
+            'p99_latency_ms': round(float(p99), 4),
+            'p999_latency_ms': round(float(p999), 4)
         }
     
     def print_packet_trace(self, packet: NetworkPacket):
@@ -140,7 +316,8 @@ class PacketTracerBridge:
         print(f"  Destination IP:   {packet.dest_ip}")
         print(f"  Payload Size:     {packet.size_bytes} bytes")
         print(f"  Network Latency:  {packet.latency_ms:.4f} ms")
-        print(f"  Timestamp:        {datetime.fromtimestamp(packet.timestamp)}")
+        wall_clock = datetime.fromtimestamp((packet.timestamp_ns + MONOTONIC_TO_WALL_NS) / 1e9)
+        print(f"  Timestamp:        {wall_clock}")
         print(f"{'='*70}\n")
 
 # Global bridge instance
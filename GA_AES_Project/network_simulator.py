@@ -3,15 +3,104 @@ Network Performance Simulator - Simulates encrypted client-server communication
 Measures end-to-end latency including encryption overhead
 """
 
+import os
 import socket
 import threading
 import time
-import random
+import itertools
+import csv
 from queue import Queue
+from multiprocessing.pool import ThreadPool
 import numpy as np
-import matplotlib.pyplot as plt
 from aes_custom import CustomAES, SecurityMetrics
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
 from Crypto.Random import get_random_bytes
+from network_bridge import encode_records, decode_records
+
+# Transport encryption backends: 'custom' goes through CustomAES (GA key
+# schedule), 'aesni' uses one pycryptodome AES-NI cipher built at init
+AES_BACKENDS = ('custom', 'aesni')
+
+# Transport cipher modes: 'ecb' pads each message, 'ctr' sends an 8-byte
+# nonce followed by the unpadded keystream-XORed message
+TRANSPORT_MODES = ('ecb', 'ctr')
+CTR_NONCE_SIZE = 8
+
+# One row per server request; 'done' marks rows that have been written
+METRICS_DTYPE = np.dtype([
+    ('client_id', 'i4'),
+    ('batch_size', 'i4'),
+    ('network_delay', 'f4'),
+    ('decrypt_time', 'f4'),
+    ('encrypt_time', 'f4'),
+    ('processing_time', 'f4'),
+    ('total_time', 'f4'),
+    ('done', '?'),
+])
+
+
+def _new_transport_cipher(aes_backend, key):
+    """Return the AES-NI ECB cipher for 'aesni', None for 'custom'"""
+    if aes_backend not in AES_BACKENDS:
+        raise ValueError(f"Unknown aes_backend {aes_backend!r}, expected one of {AES_BACKENDS}")
+    if aes_backend == 'aesni':
+        return AES.new(key, AES.MODE_ECB, use_aesni=True)
+    return None
+
+
+def _check_transport_mode(transport_mode):
+    if transport_mode not in TRANSPORT_MODES:
+        raise ValueError(f"Unknown transport_mode {transport_mode!r}, expected one of {TRANSPORT_MODES}")
+    return transport_mode
+
+
+def _new_ctr_cipher(aes, cipher, key, nonce):
+    """CTR cipher on the same backend as 'cipher' (AES-NI) or 'aes' (CustomAES)"""
+    if cipher is not None:
+        return AES.new(key, AES.MODE_CTR, nonce=nonce, use_aesni=True)
+    return aes.new_ctr_cipher(key, nonce)
+
+
+def _transport_encrypt(endpoint, data):
+    """Encrypt data with the endpoint's transport backend and mode"""
+    if endpoint.transport_mode == 'ctr':
+        nonce = get_random_bytes(CTR_NONCE_SIZE)
+        return nonce + _new_ctr_cipher(endpoint.aes, endpoint.cipher, endpoint.key, nonce).encrypt(data)
+    if endpoint.cipher is not None:
+        return endpoint.cipher.encrypt(pad(data, AES.block_size))
+    return endpoint.aes.encrypt(data, endpoint.key)
+
+
+def _transport_decrypt(endpoint, data):
+    """Decrypt data produced by _transport_encrypt on an endpoint with the same settings"""
+    if endpoint.transport_mode == 'ctr':
+        nonce = bytes(data[:CTR_NONCE_SIZE])
+        return _new_ctr_cipher(endpoint.aes, endpoint.cipher, endpoint.key, nonce).decrypt(data[CTR_NONCE_SIZE:])
+    if endpoint.cipher is not None:
+        return unpad(endpoint.cipher.decrypt(data), AES.block_size)
+    return endpoint.aes.decrypt(data, endpoint.key)
+
+
+class SamplePool:
+    """
+    Uniform samples drawn in one vectorized NumPy call and handed out one
+    at a time; reused cyclically once the pool is exhausted. Safe to share
+    between threads (the index comes from an itertools.count).
+    """
+    
+    def __init__(self, low, high, size=4096, rng=None):
+        rng = rng or np.random.default_rng()
+        self._samples = rng.uniform(low, high, max(1, size)).tolist()
+        self._idx = itertools.count()
+    
+    def next(self):
+        """Return the next sample"""
+        return self._samples[next(self._idx) % len(self._samples)]
+    
+    def take(self, n):
+        """Return the next n samples as a list"""
+        return [self.next() for _ in range(n)]
 
 
 class NetworkSimulator:
@@ -19,20 +108,31 @@ class NetworkSimulator:
     Simulates network with encryption overhead
     """
     
-    def __init__(self, base_latency_ms=2.0, jitter_ms=0.5):
+    def __init__(self, base_latency_ms=2.0, jitter_ms=0.5, real_time_delay=True,
+                 n_samples_hint=4096):
         """
         Args:
             base_latency_ms: Base network latency in milliseconds
             jitter_ms: Random jitter variation
+            real_time_delay: Sleep for each delay; if False the delay is only
+                sampled and added to the reported times (virtual time)
+            n_samples_hint: Expected number of delays; jitter is pre-sampled
         """
         self.base_latency = base_latency_ms / 1000  # Convert to seconds
         self.jitter = jitter_ms / 1000
+        self.real_time_delay = real_time_delay
+        self._jitter_pool = SamplePool(-self.jitter, self.jitter, n_samples_hint)
     
     def simulate_network_delay(self):
         """Simulate network latency with jitter"""
-        delay = self.base_latency + random.uniform(-self.jitter, self.jitter)
-        time.sleep(max(0, delay))
+        delay = max(0, self.base_latency + self._jitter_pool.next())
+        if self.real_time_delay:
+            time.sleep(delay)
         return delay * 1000  # Return in ms
+    
+    def virtual_delay(self, network_delay):
+        """Delay (ms) to add to wall-clock times: all of it in virtual time, none otherwise"""
+        return 0.0 if self.real_time_delay else network_delay
 
 
 class SecureServer:
@@ -40,64 +140,131 @@ class SecureServer:
     Simulated secure server with encryption
     """
     
-    def __init__(self, aes_params=None, network_sim=None):
+    def __init__(self, aes_params=None, network_sim=None, aes_backend='custom',
+                 max_requests=1024, transport_mode='ecb'):
+        """
+        Args:
+            aes_params: CustomAES key schedule parameters
+            network_sim: NetworkSimulator to use (default one if None)
+            aes_backend: 'custom' (CustomAES) or 'aesni' (pycryptodome AES-NI)
+            max_requests: Metrics rows preallocated per buffer chunk
+            transport_mode: 'ecb' (padded blocks) or 'ctr' (nonce + keystream)
+        """
         self.aes = CustomAES(aes_params)
         self.key = get_random_bytes(16)
+        self.aes_backend = aes_backend
+        self.cipher = _new_transport_cipher(aes_backend, self.key)
+        self.transport_mode = _check_transport_mode(transport_mode)
+        # Build the cipher context (and the key schedule behind the entropy
+        # metric) once, not per request
+        self.aes.prepare(self.key)
         self.network_sim = network_sim or NetworkSimulator()
-        self.metrics = []
+        self._processing_pool = SamplePool(0.1, 0.5, max_requests)  # Simulated processing (ms)
+        # Metrics live in fixed-size structured chunks that never move; each
+        # request claims a row from the counter (atomic under the GIL) and
+        # writes it without locking. The lock only guards adding a chunk.
+        self._chunk_size = max(1, max_requests)
+        self._chunks = [np.zeros(self._chunk_size, dtype=METRICS_DTYPE)]
+        self._idx = itertools.count()
         self.lock = threading.Lock()
         
     def handle_request(self, client_id, encrypted_data):
         """
         Handle encrypted request from client
-        Returns: dict with timing metrics
+        Returns: metrics record (fields of METRICS_DTYPE)
         """
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         # Simulate network receive delay
         network_delay = self.network_sim.simulate_network_delay()
         
         # Decrypt data
-        decrypt_start = time.time()
+        decrypt_start = time.perf_counter_ns()
         try:
-            decrypted_data = self.aes.decrypt(encrypted_data, self.key)
-            decrypt_time = (time.time() - decrypt_start) * 1000
+            decrypted_data = self._decrypt(encrypted_data)
+            decrypt_time = (time.perf_counter_ns() - decrypt_start) / 1e6
         except Exception as e:
             print(f"Decryption error: {e}")
             return None
         
         # Process (simulate)
-        processing_time = random.uniform(0.1, 0.5)
+        processing_time = self._processing_pool.next()
         time.sleep(processing_time / 1000)
         
         # Encrypt response
-        encrypt_start = time.time()
-        response = self.aes.encrypt(b"ACK: " + decrypted_data[:20], self.key)
-        encrypt_time = (time.time() - encrypt_start) * 1000
+        encrypt_start = time.perf_counter_ns()
+        response = self._encrypt(b"ACK: " + decrypted_data[:20])
+        encrypt_time = (time.perf_counter_ns() - encrypt_start) / 1e6
         
         # Simulate network send delay
         network_delay += self.network_sim.simulate_network_delay()
         
-        total_time = (time.time() - start_time) * 1000
+        total_time = (time.perf_counter_ns() - start_time) / 1e6 + self.network_sim.virtual_delay(network_delay)
         
-        metrics = {
-            'client_id': client_id,
-            'network_delay': network_delay,
-            'decrypt_time': decrypt_time,
-            'encrypt_time': encrypt_time,
-            'processing_time': processing_time,
-            'total_time': total_time
-        }
+        return self._record_metrics((client_id, 1, network_delay, decrypt_time,
+                                     encrypt_time, processing_time, total_time, True))
+    
+    def handle_batch(self, client_id, encrypted_data):
+        """
+        Handle a batch of length-prefixed messages encrypted as one buffer
+        Decrypts and re-encrypts once per batch; returns one metrics record
+        """
+        start_time = time.perf_counter_ns()
         
-        with self.lock:
-            self.metrics.append(metrics)
+        # Simulate network receive delay
+        network_delay = self.network_sim.simulate_network_delay()
+        
+        # Decrypt the whole batch, then split it into messages
+        decrypt_start = time.perf_counter_ns()
+        try:
+            messages = decode_records(self._decrypt(encrypted_data))
+            decrypt_time = (time.perf_counter_ns() - decrypt_start) / 1e6
+        except Exception as e:
+            print(f"Decryption error: {e}")
+            return None
+        
+        # Process (simulate), same per-message cost as handle_request
+        processing_time = sum(self._processing_pool.take(len(messages)))
+        time.sleep(processing_time / 1000)
+        
+        # Encrypt all responses in one call
+        encrypt_start = time.perf_counter_ns()
+        response = self._encrypt(encode_records([b"ACK: " + m[:20] for m in messages]))
+        encrypt_time = (time.perf_counter_ns() - encrypt_start) / 1e6
         
-        return metrics
+        # Simulate network send delay
+        network_delay += self.network_sim.simulate_network_delay()
+        
+        total_time = (time.perf_counter_ns() - start_time) / 1e6 + self.network_sim.virtual_delay(network_delay)
+        
+        return self._record_metrics((client_id, len(messages), network_delay, decrypt_time,
+                                     encrypt_time, processing_time, total_time, True))
+    
+    def _record_metrics(self, row):
+        """Write one metrics row into the next free slot and return it as a record"""
+        chunk_idx, offset = divmod(next(self._idx), self._chunk_size)
+        chunks = self._chunks
+        if chunk_idx >= len(chunks):
+            with self.lock:
+                while chunk_idx >= len(chunks):
+                    chunks.append(np.zeros(self._chunk_size, dtype=METRICS_DTYPE))
+        chunk = chunks[chunk_idx]
+        chunk[offset] = row
+        return chunk[offset]
+    
+    def _encrypt(self, data):
+        """Encrypt with the configured transport backend and mode"""
+        return _transport_encrypt(self, data)
+    
+    def _decrypt(self, data):
+        """Decrypt with the configured transport backend and mode"""
+        return _transport_decrypt(self, data)
     
     def get_metrics(self):
-        """Return collected metrics"""
+        """Return collected metrics as a structured array (one row per request)"""
         with self.lock:
-            return self.metrics.copy()
+            metrics = np.concatenate(self._chunks)
+        return metrics[metrics['done']]
 
 
 class SecureClient:
@@ -105,32 +272,81 @@ class SecureClient:
     Simulated secure client
     """
     
-    def __init__(self, client_id, server, aes_params=None):
+    def __init__(self, client_id, server, aes_params=None, aes_backend=None):
+        """
+        Args:
+            aes_backend: 'custom' or 'aesni'; defaults to the server's backend
+        """
         self.client_id = client_id
         self.server = server
         self.aes = CustomAES(aes_params)
         self.key = server.key  # Shared key
+        self.aes_backend = aes_backend or server.aes_backend
+        self.cipher = _new_transport_cipher(self.aes_backend, self.key)
+        self.transport_mode = server.transport_mode  # Must match the server
+        # Build the cipher context (and the key schedule behind the entropy
+        # metric) once, not per message
+        self.aes.prepare(self.key)
         self.results = []
     
     def send_message(self, message):
         """
         Send encrypted message to server
+        message: bytes (str is encoded first, outside the timed region)
         """
-        start_time = time.time()
+        if not isinstance(message, bytes):
+            message = message.encode()
+        
+        start_time = time.perf_counter_ns()
         
         # Encrypt message
-        encrypt_start = time.time()
-        encrypted_data = self.aes.encrypt(message.encode(), self.key)
-        encrypt_time = (time.time() - encrypt_start) * 1000
+        encrypted_data = self._encrypt(message)
+        encrypt_time = (time.perf_counter_ns() - start_time) / 1e6
         
         # Send to server
         server_metrics = self.server.handle_request(self.client_id, encrypted_data)
         
-        if server_metrics:
-            total_time = (time.time() - start_time) * 1000
+        if server_metrics is not None:
+            total_time = ((time.perf_counter_ns() - start_time) / 1e6
+                          + self.server.network_sim.virtual_delay(server_metrics['network_delay']))
+            
+            result = {
+                'client_id': self.client_id,
+                'client_encrypt_time': encrypt_time,
+                'server_metrics': server_metrics,
+                'end_to_end_time': total_time
+            }
+            
+            self.results.append(result)
+            return result
+        
+        return None
+    
+    def send_batch(self, messages):
+        """
+        Send several messages as one encrypted request
+        Messages are length-prefixed into one buffer and encrypted in a
+        single call, so the per-call cipher overhead is paid once per batch
+        """
+        messages = [m if isinstance(m, bytes) else m.encode() for m in messages]
+        
+        start_time = time.perf_counter_ns()
+        
+        # Encrypt all messages at once
+        buffer = encode_records(messages)
+        encrypted_data = self._encrypt(buffer)
+        encrypt_time = (time.perf_counter_ns() - start_time) / 1e6
+        
+        # Send to server
+        server_metrics = self.server.handle_batch(self.client_id, encrypted_data)
+        
+        if server_metrics is not None:
+            total_time = ((time.perf_counter_ns() - start_time) / 1e6
+                          + self.server.network_sim.virtual_delay(server_metrics['network_delay']))
             
             result = {
                 'client_id': self.client_id,
+                'batch_size': len(messages),
                 'client_encrypt_time': encrypt_time,
                 'server_metrics': server_metrics,
                 'end_to_end_time': total_time
@@ -141,6 +357,10 @@ class SecureClient:
         
         return None
     
+    def _encrypt(self, data):
+        """Encrypt with the configured transport backend and mode"""
+        return _transport_encrypt(self, data)
+    
     def get_results(self):
         """Return all results"""
         return self.results.copy()
@@ -155,7 +375,9 @@ class NetworkPerformanceTester:
         self.results = {}
     
     def run_test(self, aes_params, test_name, num_clients=3, 
-                 messages_per_client=50, network_latency=2.0):
+                 messages_per_client=50, network_latency=2.0, aes_backend='custom',
+                 batch_size=None, real_time_delay=True, transport_mode='ecb',
+                 warmup=100, pin_threads=False):
         """
         Run complete test with multiple clients
         
@@ -165,40 +387,59 @@ class NetworkPerformanceTester:
             num_clients: Number of concurrent clients
             messages_per_client: Messages each client sends
             network_latency: Base network latency in ms
+            aes_backend: Transport encryption, 'custom' (CustomAES) or 'aesni'
+            batch_size: If set, clients send messages in encrypted batches of
+                this size (one request each) instead of one request per message
+            real_time_delay: Sleep for network delays; if False they are added
+                to the reported times only, so throughput reflects the crypto path
+            transport_mode: 'ecb' (padded blocks) or 'ctr' (nonce + keystream,
+                no padding, blocks independent)
+            warmup: Untimed encrypt/decrypt round trips per endpoint before the
+                run, so first-call setup does not skew the first samples
+            pin_threads: Pin each client thread to one CPU (Linux only)
         """
         print(f"\n{'='*60}")
         print(f"Running Test: {test_name}")
         print(f"{'='*60}")
         print(f"Clients: {num_clients}, Messages per client: {messages_per_client}")
-        print(f"Network latency: {network_latency}ms\n")
+        print(f"Network latency: {network_latency}ms, AES backend: {aes_backend} ({transport_mode})\n")
         
         # Create network simulator
-        network_sim = NetworkSimulator(base_latency_ms=network_latency, jitter_ms=0.3)
+        network_sim = NetworkSimulator(base_latency_ms=network_latency, jitter_ms=0.3,
+                                       real_time_delay=real_time_delay,
+                                       n_samples_hint=2 * num_clients * messages_per_client)
         
         # Create server
-        server = SecureServer(aes_params=aes_params, network_sim=network_sim)
+        server = SecureServer(aes_params=aes_params, network_sim=network_sim,
+                              aes_backend=aes_backend,
+                              max_requests=num_clients * messages_per_client,
+                              transport_mode=transport_mode)
         
         # Create clients
         clients = [SecureClient(i+1, server, aes_params) 
                   for i in range(num_clients)]
         
-        # Run tests
-        start_time = time.time()
-        
-        threads = []
+        # Warm up ciphers and tables outside the timed run
         for client in clients:
-            thread = threading.Thread(
-                target=self._client_worker,
-                args=(client, messages_per_client)
-            )
-            threads.append(thread)
-            thread.start()
+            for _ in range(warmup):
+                server._decrypt(client._encrypt(b'\x00' * 16))
         
-        # Wait for all threads
-        for thread in threads:
-            thread.join()
+        cpus = sorted(os.sched_getaffinity(0)) if pin_threads and hasattr(os, 'sched_setaffinity') else None
         
-        total_duration = time.time() - start_time
+        # Run tests
+        start_time = time.perf_counter_ns()
+        
+        # Clients stay threads: they mostly sleep in simulated network delays
+        # and pycryptodome releases the GIL while encrypting, while processes
+        # would need the shared server proxied across a Manager. The pool
+        # re-raises worker errors here instead of losing them in the thread.
+        with ThreadPool(num_clients) as pool:
+            pool.starmap(
+                self._client_worker,
+                [(client, messages_per_client, batch_size, cpus) for client in clients]
+            )
+        
+        total_duration = (time.perf_counter_ns() - start_time) / 1e9
         
         # Collect results
         all_client_results = []
@@ -225,68 +466,58 @@ class NetworkPerformanceTester:
         
         return stats
     
-    def _client_worker(self, client, num_messages):
+    def _client_worker(self, client, num_messages, batch_size=None, cpus=None):
         """Worker function for client thread"""
+        if cpus:
+            # Spread clients over the allowed CPUs (pid 0 = this thread)
+            os.sched_setaffinity(0, {cpus[client.client_id % len(cpus)]})
+        
+        # Messages and pauses are prepared up front, outside the timed sends
         messages = [
-            f"Message {i+1} from Client {client.client_id}"
+            f"Message {i+1} from Client {client.client_id}".encode()
             for i in range(num_messages)
         ]
+        pauses = np.random.uniform(0.01, 0.05, num_messages).tolist()
         
-        for msg in messages:
+        if batch_size:
+            for i in range(0, num_messages, batch_size):
+                client.send_batch(messages[i:i + batch_size])
+                time.sleep(pauses[i])  # Small delay between batches
+            return
+        
+        for msg, pause in zip(messages, pauses):
             client.send_message(msg)
-            time.sleep(random.uniform(0.01, 0.05))  # Small delay between messages
+            time.sleep(pause)  # Small delay between messages
     
     def _calculate_statistics(self, client_results, server_metrics):
         """Calculate performance statistics"""
         
-        # Client-side encryption times
-        client_encrypt_times = [r['client_encrypt_time'] for r in client_results]
-        
-        # Server-side metrics
-        server_decrypt_times = [m['decrypt_time'] for m in server_metrics]
-        server_encrypt_times = [m['encrypt_time'] for m in server_metrics]
-        network_delays = [m['network_delay'] for m in server_metrics]
-        total_times = [m['total_time'] for m in server_metrics]
-        
-        # End-to-end times
-        e2e_times = [r['end_to_end_time'] for r in client_results]
-        
-        stats = {
-            'client_encrypt': {
-                'mean': np.mean(client_encrypt_times),
-                'std': np.std(client_encrypt_times),
-                'min': np.min(client_encrypt_times),
-                'max': np.max(client_encrypt_times)
-            },
-            'server_decrypt': {
-                'mean': np.mean(server_decrypt_times),
-                'std': np.std(server_decrypt_times),
-                'min': np.min(server_decrypt_times),
-                'max': np.max(server_decrypt_times)
-            },
-            'server_encrypt': {
-                'mean': np.mean(server_encrypt_times),
-                'std': np.std(server_encrypt_times),
-                'min': np.min(server_encrypt_times),
-                'max': np.max(server_encrypt_times)
-            },
-            'network_delay': {
-                'mean': np.mean(network_delays),
-                'std': np.std(network_delays),
-                'min': np.min(network_delays),
-                'max': np.max(network_delays)
-            },
-            'end_to_end': {
-                'mean': np.mean(e2e_times),
-                'std': np.std(e2e_times),
-                'min': np.min(e2e_times),
-                'max': np.max(e2e_times)
-            },
-            'total_encryption_overhead': {
-                'mean': np.mean(client_encrypt_times) + 
-                        np.mean(server_decrypt_times) + 
-                        np.mean(server_encrypt_times)
-            }
+        # Client-side encryption and end-to-end times, one row per result
+        client_cols = ['client_encrypt', 'end_to_end']
+        client_arr = np.array(
+            [(r['client_encrypt_time'], r['end_to_end_time']) for r in client_results],
+            dtype=np.float64
+        ).reshape(-1, len(client_cols))
+        
+        # Server-side metrics (structured array columns)
+        server_cols = ['server_decrypt', 'server_encrypt', 'network_delay']
+        server_arr = np.column_stack([
+            server_metrics['decrypt_time'],
+            server_metrics['encrypt_time'],
+            server_metrics['network_delay']
+        ]).astype(np.float64)
+        
+        # All four moments per column in one vectorized call each
+        stats = {}
+        for cols, arr in ((client_cols, client_arr), (server_cols, server_arr)):
+            moments = zip(arr.mean(axis=0), arr.std(axis=0), arr.min(axis=0), arr.max(axis=0))
+            for col, (mean, std, min_, max_) in zip(cols, moments):
+                stats[col] = {'mean': mean, 'std': std, 'min': min_, 'max': max_}
+        
+        stats['total_encryption_overhead'] = {
+            'mean': stats['client_encrypt']['mean'] +
+                    stats['server_decrypt']['mean'] +
+                    stats['server_encrypt']['mean']
         }
         
         return stats
@@ -343,8 +574,36 @@ class NetworkPerformanceTester:
                 improvement = ((val1 - val2) / val1) * 100
                 print(f"  {'Improvement:':15s} {improvement:+.2f}%")
     
+    def dump_csv(self, path='network_results.csv'):
+        """
+        Write one summary row per test (mean/std/min/max of each timing
+        metric, overhead, throughput) for offline plotting
+        """
+        metrics = ['client_encrypt', 'server_decrypt', 'server_encrypt',
+                   'network_delay', 'end_to_end']
+        moments = ['mean', 'std', 'min', 'max']
+        
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['test_name']
+                            + [f'{m}_{k}' for m in metrics for k in moments]
+                            + ['total_encryption_overhead', 'throughput',
+                               'total_duration', 'total_messages'])
+            for name, result in self.results.items():
+                stats = result['stats']
+                writer.writerow([name]
+                                + [float(stats[m][k]) for m in metrics for k in moments]
+                                + [float(stats['total_encryption_overhead']['mean']),
+                                   stats['throughput'], stats['total_duration'],
+                                   stats['total_messages']])
+        print(f"Results written to {path}")
+    
     def plot_comparison(self, save_path='network_comparison.png'):
-        """Create comparison visualization"""
+        """
+        Create comparison visualization
+        The PNG is rendered and written on a background thread; returns that
+        thread (join it to wait for the file), or None if nothing is plotted
+        """
         if len(self.results) < 2:
             print("Need at least 2 tests to plot comparison")
             return
@@ -355,7 +614,12 @@ class NetworkPerformanceTester:
         metric_labels = ['Client Encrypt', 'Server Decrypt', 'Server Encrypt',
                         'Network Delay', 'End-to-End']
         
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+        # matplotlib is imported only when plotting (benchmarks can use dump_csv)
+        from matplotlib.figure import Figure
+        
+        # A standalone Figure (no pyplot state), so it can be saved off-thread
+        fig = Figure(figsize=(15, 10))
+        axes = fig.subplots(2, 3)
         fig.suptitle('Network Performance Comparison with Encryption', 
                     fontsize=16, fontweight='bold')
         
@@ -398,10 +662,15 @@ class NetworkPerformanceTester:
                    f'{tput:.2f}',
                    ha='center', va='bottom', fontsize=9)
         
-        plt.tight_layout()
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"\nComparison plot saved to {save_path}")
-        plt.close()
+        fig.tight_layout()
+        
+        def save():
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
+            print(f"\nComparison plot saved to {save_path}")
+        
+        thread = threading.Thread(target=save)
+        thread.start()
+        return thread
 
 
 # Example usage
@@ -0,0 +1,142 @@
+# test_framing.py
+import socket
+import asyncio
+from network_bridge import (FrameReader, encode_frame, encode_records, decode_records,
+                            FRAME_HEADER, FRAME_MESSAGE, FRAME_BATCH, MAX_FRAME_SIZE)
+from integration_server import IntegrationServer
+from integration_client import IntegrationClient
+
+
+class ChunkedSocket:
+    """Socket stand-in whose recv_into returns at most chunk_size bytes per call"""
+
+    def __init__(self, data, chunk_size):
+        self.data = bytes(data)
+        self.chunk_size = chunk_size
+        self.offset = 0
+
+    def recv_into(self, buffer):
+        n = min(self.chunk_size, len(buffer), len(self.data) - self.offset)
+        buffer[:n] = self.data[self.offset:self.offset + n]
+        self.offset += n
+        return n
+
+
+def read_all(sock, **kwargs):
+    return [(kind, bytes(payload)) for kind, payload in FrameReader(sock, **kwargs)]
+
+
+def test_single_and_batch_roundtrip():
+    records = [b"first", b"", b"x" * 300]
+    frames = [(FRAME_MESSAGE, b"hello"), (FRAME_BATCH, encode_records(records))]
+
+    a, b = socket.socketpair()
+    try:
+        a.sendall(b"".join(encode_frame(payload, kind) for kind, payload in frames))
+        a.close()
+        received = read_all(b)
+    finally:
+        b.close()
+
+    assert received == frames
+    assert decode_records(received[1][1]) == records
+
+
+def test_frame_split_across_recv_into():
+    frames = [(FRAME_MESSAGE, bytes(range(200))), (FRAME_BATCH, b"ab"), (FRAME_MESSAGE, b"c" * 40)]
+    data = b"".join(encode_frame(payload, kind) for kind, payload in frames)
+
+    # Every recv_into boundary, from one byte at a time upwards
+    for chunk_size in (1, 2, 3, FRAME_HEADER.size, 7, 64):
+        assert read_all(ChunkedSocket(data, chunk_size)) == frames
+
+    # Buffer smaller than a frame: unread bytes move to the front and the buffer grows
+    assert read_all(ChunkedSocket(data, 5), buffer_size=8) == frames
+
+
+def test_zero_length_payload():
+    data = encode_frame(b"") + encode_frame(b"after", FRAME_BATCH)
+    assert read_all(ChunkedSocket(data, 3)) == [(FRAME_MESSAGE, b""), (FRAME_BATCH, b"after")]
+    assert decode_records(b"") == []
+    assert decode_records(encode_records([b""])) == [b""]
+
+
+def test_truncated_input():
+    # Peer closes mid-header or mid-payload: no partial frame is returned
+    frame = encode_frame(b"payload")
+    for cut in (1, FRAME_HEADER.size - 1, FRAME_HEADER.size + 3):
+        assert FrameReader(ChunkedSocket(frame[:cut], 4)).read_frame() is None
+
+    # Truncated record header or body inside a batch
+    data = encode_records([b"abc"])
+    for cut in (2, len(data) - 1):
+        try:
+            decode_records(data[:cut])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"decode_records accepted {cut} of {len(data)} bytes")
+
+
+def test_reader_rejects_bad_headers():
+    for kind, length in ((FRAME_MESSAGE, MAX_FRAME_SIZE + 1), (7, 4)):
+        try:
+            FrameReader(ChunkedSocket(FRAME_HEADER.pack(kind, length), 64)).read_frame()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"FrameReader accepted kind={kind}, length={length}")
+
+
+def test_server_drops_bad_frames():
+    server = IntegrationServer(port=0)
+
+    async def exchange(data):
+        """Send data on a fresh connection and return everything the server sends back"""
+        listener = await asyncio.start_server(server.handle_client, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(data)
+            await writer.drain()
+            # Reads until the server closes the connection
+            reply = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+            await writer.wait_closed()
+        return reply
+
+    # A valid message is answered with one ACK frame before the connection closes
+    ciphertext = server.aes.encrypt(b"hello", server.key)
+    ok = encode_frame(ciphertext)
+    # Unknown kind around a decryptable payload: must not be handled as a message
+    bad_kind = FRAME_HEADER.pack(7, len(ciphertext)) + ciphertext
+    oversized = FRAME_HEADER.pack(FRAME_MESSAGE, MAX_FRAME_SIZE + 1)
+
+    reply = asyncio.run(exchange(ok + bad_kind + ok))
+    kind, length = FRAME_HEADER.unpack_from(reply)
+    assert kind == FRAME_MESSAGE and len(reply) == FRAME_HEADER.size + length
+
+    # Rejected headers close the connection without a reply (and without reading the payload)
+    assert asyncio.run(exchange(bad_kind)) == b""
+    assert asyncio.run(exchange(oversized)) == b""
+
+
+def test_empty_pipelined_batch():
+    # Nothing listens on this port: an empty batch must return before connecting
+    with socket.socket() as unused:
+        unused.bind(('127.0.0.1', 0))
+        port = unused.getsockname()[1]
+    client = IntegrationClient(server_port=port)
+    assert client.send_pipelined([]) == 0.0
+    assert client._sock is None and client.messages_sent == 0
+
+
+if __name__ == "__main__":
+    test_single_and_batch_roundtrip()
+    test_frame_split_across_recv_into()
+    test_zero_length_payload()
+    test_truncated_input()
+    test_reader_rejects_bad_headers()
+    test_server_drops_bad_frames()
+    test_empty_pipelined_batch()
+    print("All framing tests passed")
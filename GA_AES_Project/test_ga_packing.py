@@ -0,0 +1,74 @@
+# test_ga_packing.py
+import numpy as np
+from aes_custom import CustomAES, SecurityMetrics
+from ga_optimizer import (GeneticAlgorithm, KeyScheduleChromosome,
+                          pack_genes, unpack_genes, NUM_GENES)
+
+
+def test_pack_unpack_roundtrip():
+    rng = np.random.default_rng(0)
+    rotations = rng.integers(1, 4, size=(50, NUM_GENES))
+    rcon_multipliers = rng.integers(1, 4, size=(50, NUM_GENES))
+
+    rot, rcon = unpack_genes(pack_genes(rotations, rcon_multipliers))
+    assert (rot == rotations).all() and (rcon == rcon_multipliers).all()
+
+    # Single chromosome (1-D genes -> scalar)
+    rot, rcon = unpack_genes(pack_genes([1, 2, 3] * 3 + [1], [3] * 10))
+    assert rot.tolist() == [1, 2, 3] * 3 + [1] and rcon.tolist() == [3] * 10
+
+
+def test_pack_rejects_out_of_range_genes():
+    for rotations, rcon_multipliers in (([4] + [1] * 9, [1] * 10),
+                                        ([1] * 10, [0] + [1] * 9)):
+        try:
+            pack_genes(rotations, rcon_multipliers)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"accepted {rotations}, {rcon_multipliers}")
+
+
+def test_crossover_mask():
+    ga = GeneticAlgorithm(CustomAES, SecurityMetrics, crossover_rate=1.0, seed=1)
+    n = 200
+    p1 = pack_genes(np.full((n, NUM_GENES), 1), np.full((n, NUM_GENES), 2))
+    p2 = pack_genes(np.full((n, NUM_GENES), 3), np.full((n, NUM_GENES), 1))
+    rot, rcon = unpack_genes(ga._crossover_batch(p1, p2).reshape(n, 2))
+
+    for (rot1, rot2), (rcon1, rcon2) in zip(rot.tolist(), rcon.tolist()):
+        # One point in 1-9, shared by rotations and rcon multipliers
+        point = rot1.index(3)
+        assert 1 <= point < NUM_GENES
+        assert rot1 == [1] * point + [3] * (NUM_GENES - point)
+        assert rcon1 == [2] * point + [1] * (NUM_GENES - point)
+        assert rot2 == [3] * point + [1] * (NUM_GENES - point)
+        assert rcon2 == [1] * point + [2] * (NUM_GENES - point)
+
+    # Without crossover the children are copies of their parents
+    ga.crossover_rate = 0.0
+    children = ga._crossover_batch(p1, p2).reshape(n, 2)
+    assert (children[:, 0] == p1).all() and (children[:, 1] == p2).all()
+
+
+def test_chromosome_operators():
+    ga = GeneticAlgorithm(CustomAES, SecurityMetrics, crossover_rate=1.0, seed=2)
+    parent1 = KeyScheduleChromosome([1] * 10, [1] * 10)
+    parent2 = KeyScheduleChromosome([3] * 10, [3] * 10)
+    child1, child2 = ga.crossover_single_point(parent1, parent2)
+    assert sorted(child1.rotations + child2.rotations) == [1] * 10 + [3] * 10
+
+    try:
+        ga.evaluate_fitness(KeyScheduleChromosome([4] + [1] * 9, [1] * 10))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("evaluate_fitness accepted an out-of-range gene")
+
+
+if __name__ == "__main__":
+    test_pack_unpack_roundtrip()
+    test_pack_rejects_out_of_range_genes()
+    test_crossover_mask()
+    test_chromosome_operators()
+    print("All gene packing tests passed")
@@ -2,11 +2,102 @@
 Comprehensive Testing and Visualization for GA-Optimized AES
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
 from Crypto.Random import get_random_bytes
+from Crypto.Util.Padding import pad, unpad
 import time
 import json
+import functools
+from multiprocessing import Pool
+
+# orjson (optional) serializes results faster and handles NumPy scalars natively
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Shared bar/histogram styling for the standard vs optimized plots
+_CATEGORIES = ('Standard', 'Optimized')
+_COLORS = ('#3498db', '#2ecc71')
+
+
+@functools.lru_cache(maxsize=4096)
+def _eval_params(custom_aes_class, security_metrics_class, rotations, rcon_multipliers,
+                 key, plaintext, num_tests):
+    """
+    Security/speed metrics for one key schedule configuration
+    Cached on (classes, parameter tuples, key, plaintext, num_tests), so
+    identical configurations are only measured once
+    """
+    aes = custom_aes_class({'rotations': list(rotations),
+                            'rcon_multipliers': list(rcon_multipliers)})
+    metrics = security_metrics_class()
+    
+    avalanche_mean, avalanche_std = metrics.calculate_avalanche_effect(aes, key, num_tests)
+    encryption_time = metrics.measure_encryption_time(aes, key, 1024, 200)
+    
+    aes.expand_key(key)  # Populate the key schedule for the entropy metric
+    entropy = aes.get_key_schedule_entropy()
+    
+    ciphertext_entropy = metrics.calculate_entropy(aes.encrypt(plaintext, key))
+    
+    return {
+        'avalanche_mean': avalanche_mean,
+        'avalanche_std': avalanche_std,
+        'encryption_time': encryption_time,
+        'entropy': entropy,
+        'ciphertext_entropy': ciphertext_entropy
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _pyplot():
+    """
+    Import pyplot on first use with the non-interactive Agg backend, so
+    importing this module for ComprehensiveTester never loads matplotlib
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _reusable_figure(plt, figsize):
+    """
+    Return the shared Visualizer figure, cleared and resized, creating it
+    on first use; plots redraw into it instead of building a new Figure
+    """
+    fig = plt.figure(num='Visualizer', clear=True)
+    fig.set_size_inches(figsize)
+    return fig
+
+
+def _save_figure(plt, save_path, prefer_vector=False):
+    """
+    Save the current figure and return the path written
+    With prefer_vector, a .png path is written as .svg instead (paths and
+    text, no 300 dpi rasterization or PNG compression)
+    """
+    if prefer_vector and save_path.lower().endswith('.png'):
+        save_path = save_path[:-4] + '.svg'
+        plt.savefig(save_path, bbox_inches='tight')
+    else:
+        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+    return save_path
+
+
+def _json_default(obj):
+    """json.dump fallback for NumPy scalars/arrays in results"""
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _params_key(params):
+    """Hashable (rotations, rcon_multipliers) tuples for a parameter dict"""
+    params = params or {}
+    return (tuple(params.get('rotations', [1] * 10)),
+            tuple(params.get('rcon_multipliers', [1] * 10)))
 
 
 class ComprehensiveTester:
@@ -14,9 +105,10 @@ class ComprehensiveTester:
     Test and compare standard vs GA-optimized AES configurations
     """
     
-    def __init__(self, custom_aes_class, security_metrics_class):
+    def __init__(self, custom_aes_class, security_metrics_class, n_workers=1):
         self.CustomAES = custom_aes_class
         self.SecurityMetrics = security_metrics_class
+        self.n_workers = n_workers  # >1 measures the two configurations in parallel processes
         self.results = {}
     
     def compare_configurations(self, standard_params, optimized_params, num_tests=100):
@@ -27,74 +119,50 @@ class ComprehensiveTester:
         
         # Test key
         test_key = get_random_bytes(16)
+        plaintext = get_random_bytes(1024)
         
         # Create instances
         standard_aes = self.CustomAES(standard_params)
         optimized_aes = self.CustomAES(optimized_params)
-        metrics = self.SecurityMetrics()
         
-        results = {
-            'standard': {},
-            'optimized': {}
-        }
+        # Tests 1-4 per configuration, through the parameter-keyed cache
+        # (an optimized config equal to the standard one is measured once).
+        # The two configurations share nothing, so with n_workers > 1 they
+        # run in separate processes; their timings then compete for cores.
+        names = ('standard', 'optimized')
+        tasks = [(self.CustomAES, self.SecurityMetrics, *_params_key(params),
+                  test_key, plaintext, num_tests)
+                 for params in (standard_params, optimized_params)]
+        if self.n_workers > 1 and tasks[0] != tasks[1]:
+            with Pool(min(self.n_workers, len(tasks))) as pool:
+                evaluated = pool.starmap(_eval_params, tasks)
+        else:
+            evaluated = [_eval_params(*task) for task in tasks]
+        results = {name: dict(metrics) for name, metrics in zip(names, evaluated)}
+        std, opt = results['standard'], results['optimized']
         
         # Test 1: Avalanche Effect
         print("Testing Avalanche Effect...")
-        std_avalanche_mean, std_avalanche_std = metrics.calculate_avalanche_effect(
-            standard_aes, test_key, num_tests
-        )
-        opt_avalanche_mean, opt_avalanche_std = metrics.calculate_avalanche_effect(
-            optimized_aes, test_key, num_tests
-        )
-        
-        results['standard']['avalanche_mean'] = std_avalanche_mean
-        results['standard']['avalanche_std'] = std_avalanche_std
-        results['optimized']['avalanche_mean'] = opt_avalanche_mean
-        results['optimized']['avalanche_std'] = opt_avalanche_std
-        
-        print(f"  Standard: {std_avalanche_mean:.2f}% ± {std_avalanche_std:.2f}%")
-        print(f"  Optimized: {opt_avalanche_mean:.2f}% ± {opt_avalanche_std:.2f}%")
+        print(f"  Standard: {std['avalanche_mean']:.2f}% ± {std['avalanche_std']:.2f}%")
+        print(f"  Optimized: {opt['avalanche_mean']:.2f}% ± {opt['avalanche_std']:.2f}%")
         
         # Test 2: Encryption Speed
         print("\nTesting Encryption Speed...")
-        std_time = metrics.measure_encryption_time(standard_aes, test_key, 1024, 200)
-        opt_time = metrics.measure_encryption_time(optimized_aes, test_key, 1024, 200)
-        
-        results['standard']['encryption_time'] = std_time
-        results['optimized']['encryption_time'] = opt_time
-        
+        std_time = std['encryption_time']
+        opt_time = opt['encryption_time']
         print(f"  Standard: {std_time:.4f} ms")
         print(f"  Optimized: {opt_time:.4f} ms")
         print(f"  Speed improvement: {((std_time - opt_time) / std_time * 100):.2f}%")
         
         # Test 3: Key Schedule Entropy
         print("\nTesting Key Schedule Entropy...")
-        _ = standard_aes.encrypt(b"test" * 4, test_key)
-        std_entropy = standard_aes.get_key_schedule_entropy()
-        
-        _ = optimized_aes.encrypt(b"test" * 4, test_key)
-        opt_entropy = optimized_aes.get_key_schedule_entropy()
-        
-        results['standard']['entropy'] = std_entropy
-        results['optimized']['entropy'] = opt_entropy
-        
-        print(f"  Standard: {std_entropy:.4f} bits")
-        print(f"  Optimized: {opt_entropy:.4f} bits")
+        print(f"  Standard: {std['entropy']:.4f} bits")
+        print(f"  Optimized: {opt['entropy']:.4f} bits")
         
         # Test 4: Ciphertext Entropy
         print("\nTesting Ciphertext Entropy...")
-        plaintext = get_random_bytes(1024)
-        std_ct = standard_aes.encrypt(plaintext, test_key)
-        opt_ct = optimized_aes.encrypt(plaintext, test_key)
-        
-        std_ct_entropy = metrics.calculate_entropy(std_ct)
-        opt_ct_entropy = metrics.calculate_entropy(opt_ct)
-        
-        results['standard']['ciphertext_entropy'] = std_ct_entropy
-        results['optimized']['ciphertext_entropy'] = opt_ct_entropy
-        
-        print(f"  Standard: {std_ct_entropy:.4f} bits")
-        print(f"  Optimized: {opt_ct_entropy:.4f} bits")
+        print(f"  Standard: {std['ciphertext_entropy']:.4f} bits")
+        print(f"  Optimized: {opt['ciphertext_entropy']:.4f} bits")
         
         # Test 5: Correctness Test
         print("\nTesting Encryption/Decryption Correctness...")
@@ -105,13 +173,20 @@ class ComprehensiveTester:
             get_random_bytes(256)
         ]
         
+        # Pad every message on its own and round-trip them as one buffer per
+        # configuration (ECB blocks are independent), then split on the
+        # recorded offsets and strip each message's padding again
+        padded = [pad(msg, 16) for msg in test_messages]
+        offsets = np.cumsum([0] + [len(p) for p in padded])
+        buf = b"".join(padded)
+        std_buf = standard_aes.decrypt(standard_aes.encrypt(buf, test_key), test_key)
+        opt_buf = optimized_aes.decrypt(optimized_aes.encrypt(buf, test_key), test_key)
+        
         all_correct = True
         for i, msg in enumerate(test_messages):
-            std_ct = standard_aes.encrypt(msg, test_key)
-            std_pt = standard_aes.decrypt(std_ct, test_key)
-            
-            opt_ct = optimized_aes.encrypt(msg, test_key)
-            opt_pt = optimized_aes.decrypt(opt_ct, test_key)
+            start, end = offsets[i], offsets[i + 1]
+            std_pt = unpad(std_buf[start:end], 16)
+            opt_pt = unpad(opt_buf[start:end], 16)
             
             if std_pt != msg or opt_pt != msg:
                 all_correct = False
@@ -126,8 +201,13 @@ class ComprehensiveTester:
     
     def save_results(self, filename='comparison_results.json'):
         """Save results to JSON file"""
-        with open(filename, 'w') as f:
-            json.dump(self.results, f, indent=2)
+        if orjson is not None:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(self.results,
+                                     option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(filename, 'w') as f:
+                json.dump(self.results, f, indent=2, default=_json_default)
         print(f"\nResults saved to {filename}")
 
 
@@ -137,11 +217,13 @@ class Visualizer:
     """
     
     @staticmethod
-    def plot_ga_evolution(history, save_path='ga_evolution.png'):
+    def plot_ga_evolution(history, save_path='ga_evolution.png', prefer_vector=False):
         """
         Plot fitness evolution over generations
         """
-        plt.figure(figsize=(10, 6))
+        plt = _pyplot()
+        
+        _reusable_figure(plt, (10, 6))
         
         generations = history['generations']
         best_fitness = history['best_fitness']
@@ -159,18 +241,14 @@ class Visualizer:
         plt.grid(True, alpha=0.3)
         plt.tight_layout()
         
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        save_path = _save_figure(plt, save_path, prefer_vector)
         print(f"GA evolution plot saved to {save_path}")
-        plt.close()
     
     @staticmethod
-    def plot_comparison_metrics(results, save_path='comparison_metrics.png'):
+    def plot_comparison_metrics(results, save_path='comparison_metrics.png', prefer_vector=False):
         """
         Create bar charts comparing standard vs optimized configurations
         """
-        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-        fig.suptitle('Standard AES vs GA-Optimized AES Comparison', 
-                    fontsize=16, fontweight='bold')
         # Support several input shapes:
         # - direct results dict with 'standard' and 'optimized'
         # - pipeline return value containing a 'results' key
@@ -187,30 +265,26 @@ class Visualizer:
         if not isinstance(results, dict) or 'standard' not in results or 'optimized' not in results:
             raise ValueError("plot_comparison_metrics expected a dict with 'standard' and 'optimized' keys")
 
-        # Convert possible numpy scalars to native Python floats to avoid indexing issues
-        def _coerce(d):
-            out = {}
-            for k, v in d.items():
-                if isinstance(v, (np.generic,)):
-                    try:
-                        out[k] = float(v)
-                    except Exception:
-                        out[k] = v
-                else:
-                    out[k] = v
-            return out
-
-        std = _coerce(results.get('standard', {}))
-        opt = _coerce(results.get('optimized', {}))
+        # Convert numpy scalars/arrays (at any depth) to native Python values
+        # once, so the plotting below only handles plain floats
+        results = json.loads(json.dumps(results, default=_json_default))
+        std = results['standard']
+        opt = results['optimized']
+        
+        plt = _pyplot()
+        
+        fig = _reusable_figure(plt, (14, 10))
+        axes = fig.subplots(2, 2)
+        fig.suptitle('Standard AES vs GA-Optimized AES Comparison', 
+                    fontsize=16, fontweight='bold')
         
         # 1. Avalanche Effect
         ax1 = axes[0, 0]
-        categories = ['Standard', 'Optimized']
         avalanche_means = [std['avalanche_mean'], opt['avalanche_mean']]
         avalanche_stds = [std['avalanche_std'], opt['avalanche_std']]
         
-        bars1 = ax1.bar(categories, avalanche_means, yerr=avalanche_stds, 
-                       capsize=5, color=['#3498db', '#2ecc71'], alpha=0.8)
+        bars1 = ax1.bar(_CATEGORIES, avalanche_means, yerr=avalanche_stds, 
+                       capsize=5, color=_COLORS, alpha=0.8)
         ax1.axhline(y=50, color='red', linestyle='--', linewidth=2, 
                    label='Ideal (50%)', alpha=0.7)
         ax1.set_ylabel('Avalanche Effect (%)', fontweight='bold')
@@ -219,25 +293,20 @@ class Visualizer:
         ax1.grid(axis='y', alpha=0.3)
         
         # Add value labels
-        for bar, mean, std_dev in zip(bars1, avalanche_means, avalanche_stds):
-            height = bar.get_height()
-            ax1.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{mean:.2f}%\n±{std_dev:.2f}',
-                    ha='center', va='bottom', fontsize=9)
+        ax1.bar_label(bars1, labels=[f'{mean:.2f}%\n±{std_dev:.2f}'
+                                     for mean, std_dev in zip(avalanche_means, avalanche_stds)],
+                      padding=3, fontsize=9)
         
         # 2. Encryption Time
         ax2 = axes[0, 1]
         times = [std['encryption_time'], opt['encryption_time']]
-        bars2 = ax2.bar(categories, times, color=['#3498db', '#2ecc71'], alpha=0.8)
+        bars2 = ax2.bar(_CATEGORIES, times, color=_COLORS, alpha=0.8)
         ax2.set_ylabel('Time (ms)', fontweight='bold')
         ax2.set_title('Encryption Speed Comparison', fontweight='bold')
         ax2.grid(axis='y', alpha=0.3)
         
-        for bar, time_val in zip(bars2, times):
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{time_val:.4f}ms',
-                    ha='center', va='bottom', fontsize=9)
+        ax2.bar_label(bars2, labels=[f'{time_val:.4f}ms' for time_val in times],
+                      padding=3, fontsize=9)
         
         # Calculate improvement
         improvement = ((std['encryption_time'] - opt['encryption_time']) / 
@@ -250,74 +319,63 @@ class Visualizer:
         # 3. Key Schedule Entropy
         ax3 = axes[1, 0]
         entropies = [std['entropy'], opt['entropy']]
-        bars3 = ax3.bar(categories, entropies, color=['#3498db', '#2ecc71'], alpha=0.8)
+        bars3 = ax3.bar(_CATEGORIES, entropies, color=_COLORS, alpha=0.8)
         ax3.set_ylabel('Entropy (bits)', fontweight='bold')
         ax3.set_title('Key Schedule Entropy Comparison', fontweight='bold')
         ax3.set_ylim([0, 8])
         ax3.grid(axis='y', alpha=0.3)
         
-        for bar, ent in zip(bars3, entropies):
-            height = bar.get_height()
-            ax3.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{ent:.4f}',
-                    ha='center', va='bottom', fontsize=9)
+        ax3.bar_label(bars3, fmt='%.4f', padding=3, fontsize=9)
         
         # 4. Ciphertext Entropy
         ax4 = axes[1, 1]
         ct_entropies = [std['ciphertext_entropy'], opt['ciphertext_entropy']]
-        bars4 = ax4.bar(categories, ct_entropies, color=['#3498db', '#2ecc71'], alpha=0.8)
+        bars4 = ax4.bar(_CATEGORIES, ct_entropies, color=_COLORS, alpha=0.8)
         ax4.set_ylabel('Entropy (bits)', fontweight='bold')
         ax4.set_title('Ciphertext Entropy Comparison', fontweight='bold')
         ax4.set_ylim([0, 8])
         ax4.grid(axis='y', alpha=0.3)
         
-        for bar, ct_ent in zip(bars4, ct_entropies):
-            height = bar.get_height()
-            ax4.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{ct_ent:.4f}',
-                    ha='center', va='bottom', fontsize=9)
+        ax4.bar_label(bars4, fmt='%.4f', padding=3, fontsize=9)
         
         plt.tight_layout()
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        save_path = _save_figure(plt, save_path, prefer_vector)
         print(f"Comparison plot saved to {save_path}")
-        plt.close()
     
     @staticmethod
     def plot_detailed_avalanche(standard_aes, optimized_aes, test_key, 
-                               num_tests=50, save_path='avalanche_distribution.png'):
+                               num_tests=50, save_path='avalanche_distribution.png',
+                               prefer_vector=False):
         """
         Plot distribution of avalanche effect percentages
         """
+        plt = _pyplot()
+        
         from aes_custom import SecurityMetrics
         metrics = SecurityMetrics()
         
-        # Collect individual test results
-        std_results = []
-        opt_results = []
-        
-        for _ in range(num_tests):
-            plaintext = get_random_bytes(16)
-            
-            # Standard
-            ct1 = standard_aes.encrypt(plaintext, test_key)
-            plaintext_list = list(plaintext)
-            plaintext_list[0] ^= 1
-            ct2 = standard_aes.encrypt(bytes(plaintext_list), test_key)
-            diff_bits = sum(bin(b1 ^ b2).count('1') for b1, b2 in zip(ct1, ct2))
-            std_results.append((diff_bits / (len(ct1) * 8)) * 100)
-            
-            # Optimized
-            ct1 = optimized_aes.encrypt(plaintext, test_key)
-            ct2 = optimized_aes.encrypt(bytes(plaintext_list), test_key)
-            diff_bits = sum(bin(b1 ^ b2).count('1') for b1, b2 in zip(ct1, ct2))
-            opt_results.append((diff_bits / (len(ct1) * 8)) * 100)
-        
-        plt.figure(figsize=(12, 6))
-        
-        plt.hist(std_results, bins=20, alpha=0.6, label='Standard AES', 
-                color='#3498db', edgecolor='black')
-        plt.hist(opt_results, bins=20, alpha=0.6, label='Optimized AES', 
-                color='#2ecc71', edgecolor='black')
+        # All test plaintexts as one buffer (one 16-byte block per test),
+        # and a copy with the lowest bit of each block's first byte flipped
+        plaintexts = get_random_bytes(num_tests * 16)
+        flipped = np.frombuffer(plaintexts, dtype=np.uint8).copy()
+        flipped[::16] ^= 1
+        flipped = flipped.tobytes()
+        
+        # One ECB encryption per buffer and configuration covers every test
+        std_results = metrics.avalanche_percentages(standard_aes, test_key, plaintexts, flipped)
+        opt_results = metrics.avalanche_percentages(optimized_aes, test_key, plaintexts, flipped)
+        
+        _reusable_figure(plt, (12, 6))
+        
+        # Bin both distributions on shared edges, then draw the precomputed
+        # counts (same bins for a fair overlay, no re-binning by matplotlib)
+        edges = np.histogram_bin_edges(np.concatenate([std_results, opt_results]), bins=20)
+        std_counts, _ = np.histogram(std_results, edges)
+        opt_counts, _ = np.histogram(opt_results, edges)
+        plt.stairs(std_counts, edges, fill=True, alpha=0.6, label='Standard AES',
+                  facecolor=_COLORS[0], edgecolor='black')
+        plt.stairs(opt_counts, edges, fill=True, alpha=0.6, label='Optimized AES',
+                  facecolor=_COLORS[1], edgecolor='black')
         
         plt.axvline(x=50, color='red', linestyle='--', linewidth=2, 
                    label='Ideal (50%)', alpha=0.7)
@@ -333,72 +391,80 @@ class Visualizer:
         plt.grid(axis='y', alpha=0.3)
         plt.tight_layout()
         
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        save_path = _save_figure(plt, save_path, prefer_vector)
         print(f"Avalanche distribution plot saved to {save_path}")
-        plt.close()
     
     @staticmethod
     def create_summary_report(results, best_chromosome, save_path='summary_report.txt'):
         """
         Generate text summary report
         """
+        std = results['standard']
+        opt = results['optimized']
+        
+        speed_improvement = ((std['encryption_time'] - opt['encryption_time']) / 
+                            std['encryption_time'] * 100)
+        entropy_improvement = ((opt['entropy'] - std['entropy']) / std['entropy'] * 100)
+        avalanche_improved = abs(50 - opt['avalanche_mean']) < abs(50 - std['avalanche_mean'])
+        
+        if speed_improvement > 0 and entropy_improvement > 0:
+            conclusion = ("improvements in both\n"
+                          "security (entropy) and performance (speed) compared to standard AES.\n")
+        elif speed_improvement > 0:
+            conclusion = ("improvements in performance\n"
+                          "while maintaining comparable security metrics.\n")
+        else:
+            conclusion = "enhanced security properties.\n"
+        
+        rule = "=" * 70
+        sep = "-" * 70
+        
+        # Assemble the whole report up front and hand it to the file in one write
+        report = f"""{rule}
+GA-OPTIMIZED AES KEY SCHEDULE - SUMMARY REPORT
+{rule}
+
+OPTIMIZED PARAMETERS:
+{sep}
+Rotations: {best_chromosome.rotations}
+Rcon Multipliers: {best_chromosome.rcon_multipliers}
+Fitness Score: {best_chromosome.fitness:.4f}
+
+PERFORMANCE COMPARISON:
+{sep}
+
+1. AVALANCHE EFFECT:
+   Standard:  {std['avalanche_mean']:.2f}% ± {std['avalanche_std']:.2f}%
+   Optimized: {opt['avalanche_mean']:.2f}% ± {opt['avalanche_std']:.2f}%
+   Ideal: 50%
+   Improvement: {avalanche_improved}
+
+2. ENCRYPTION SPEED:
+   Standard:  {std['encryption_time']:.4f} ms
+   Optimized: {opt['encryption_time']:.4f} ms
+   Speed Improvement: {speed_improvement:.2f}%
+
+3. KEY SCHEDULE ENTROPY:
+   Standard:  {std['entropy']:.4f} bits
+   Optimized: {opt['entropy']:.4f} bits
+   Improvement: {entropy_improvement:.2f}%
+
+4. CIPHERTEXT ENTROPY:
+   Standard:  {std['ciphertext_entropy']:.4f} bits
+   Optimized: {opt['ciphertext_entropy']:.4f} bits
+
+5. CORRECTNESS:
+   All Tests Passed: {results['correctness']}
+
+{rule}
+CONCLUSION:
+{sep}
+The GA-optimized key schedule demonstrates {conclusion}
+{rule}
+"""
+        
         with open(save_path, 'w') as f:
-            f.write("=" * 70 + "\n")
-            f.write("GA-OPTIMIZED AES KEY SCHEDULE - SUMMARY REPORT\n")
-            f.write("=" * 70 + "\n\n")
-            
-            f.write("OPTIMIZED PARAMETERS:\n")
-            f.write("-" * 70 + "\n")
-            f.write(f"Rotations: {best_chromosome.rotations}\n")
-            f.write(f"Rcon Multipliers: {best_chromosome.rcon_multipliers}\n")
-            f.write(f"Fitness Score: {best_chromosome.fitness:.4f}\n\n")
-            
-            f.write("PERFORMANCE COMPARISON:\n")
-            f.write("-" * 70 + "\n")
-            
-            std = results['standard']
-            opt = results['optimized']
-            
-            f.write(f"\n1. AVALANCHE EFFECT:\n")
-            f.write(f"   Standard:  {std['avalanche_mean']:.2f}% ± {std['avalanche_std']:.2f}%\n")
-            f.write(f"   Optimized: {opt['avalanche_mean']:.2f}% ± {opt['avalanche_std']:.2f}%\n")
-            f.write(f"   Ideal: 50%\n")
-            f.write(f"   Improvement: {abs(50 - opt['avalanche_mean']) < abs(50 - std['avalanche_mean'])}\n")
-            
-            f.write(f"\n2. ENCRYPTION SPEED:\n")
-            f.write(f"   Standard:  {std['encryption_time']:.4f} ms\n")
-            f.write(f"   Optimized: {opt['encryption_time']:.4f} ms\n")
-            speed_improvement = ((std['encryption_time'] - opt['encryption_time']) / 
-                                std['encryption_time'] * 100)
-            f.write(f"   Speed Improvement: {speed_improvement:.2f}%\n")
-            
-            f.write(f"\n3. KEY SCHEDULE ENTROPY:\n")
-            f.write(f"   Standard:  {std['entropy']:.4f} bits\n")
-            f.write(f"   Optimized: {opt['entropy']:.4f} bits\n")
-            entropy_improvement = ((opt['entropy'] - std['entropy']) / std['entropy'] * 100)
-            f.write(f"   Improvement: {entropy_improvement:.2f}%\n")
-            
-            f.write(f"\n4. CIPHERTEXT ENTROPY:\n")
-            f.write(f"   Standard:  {std['ciphertext_entropy']:.4f} bits\n")
-            f.write(f"   Optimized: {opt['ciphertext_entropy']:.4f} bits\n")
-            
-            f.write(f"\n5. CORRECTNESS:\n")
-            f.write(f"   All Tests Passed: {results['correctness']}\n")
-            
-            f.write("\n" + "=" * 70 + "\n")
-            f.write("CONCLUSION:\n")
-            f.write("-" * 70 + "\n")
-            f.write("The GA-optimized key schedule demonstrates ")
-            if speed_improvement > 0 and entropy_improvement > 0:
-                f.write("improvements in both\n")
-                f.write("security (entropy) and performance (speed) compared to standard AES.\n")
-            elif speed_improvement > 0:
-                f.write("improvements in performance\n")
-                f.write("while maintaining comparable security metrics.\n")
-            else:
-                f.write("enhanced security properties.\n")
-            
-            f.write("\n" + "=" * 70 + "\n")
+            f.write(report)
         
         print(f"Summary report saved to {save_path}")
 